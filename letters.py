@@ -0,0 +1,67 @@
+# letters.py
+# Target point sets for the letters the swarm builds (shared by main.py and tools/bake_letters.py)
+
+import os
+from functools import lru_cache
+import numpy as np
+
+# baked point sets live here, one letter_points_<L>.npz per letter (see tools/bake_letters.py)
+BAKED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "letter_points")
+
+def _build_A(s):
+    """Letter A: two legs, a crossbar and an interior fill, as an (N, 3) array"""
+    height = 8 * s
+    half_width = 3 * s
+    t = np.linspace(0, 1, 9)
+    zeros = np.zeros_like(t)
+    left_leg = np.stack([-half_width * (1 - t), -height/2 + t * height, zeros], axis=1)
+    right_leg = np.stack([half_width * (1 - t), -height/2 + t * height, zeros], axis=1)
+    cross_x = np.arange(-2, 3) * s
+    crossbar = np.stack([cross_x, np.zeros_like(cross_x), np.zeros_like(cross_x)], axis=1)
+    rx, ry = np.meshgrid([-1, 0, 1], [1, 2, 3], indexing="ij")
+    interior = np.stack([rx.ravel() * s, ry.ravel() * s - height/2 + 2*s, np.zeros(9)], axis=1)
+    return np.concatenate([left_leg, right_leg, crossbar, interior])
+
+def _build_fallback(s):
+    """Any letter without a builder: rectangle outline"""
+    w = 8 * s
+    h = 10 * s
+    steps = 14
+    t = np.linspace(0, 1, steps+1)
+    pts = np.zeros((steps+1, 4, 3))
+    pts[:, 0, 0] = -w/2 + t*w
+    pts[:, 0, 1] = -h/2
+    pts[:, 1, 0] = -w/2 + t*w
+    pts[:, 1, 1] = h/2
+    pts[:, 2, 0] = -w/2
+    pts[:, 2, 1] = -h/2 + t*h
+    pts[:, 3, 0] = w/2
+    pts[:, 3, 1] = -h/2 + t*h
+    return pts.reshape(-1, 3)
+
+LETTER_BUILDERS = {
+    "A": _build_A,
+}
+
+@lru_cache(maxsize=64)
+def generate_letter_points(letter_char, scale=1.0, spacing=2.5):
+    """Generate points for letter construction as read-only (x, y, z) tuples"""
+    pts = LETTER_BUILDERS.get(letter_char, _build_fallback)(scale * spacing)
+    
+    # deduplicate on rounded (x, y), keeping first occurrences in order
+    _, keep = np.unique(np.round(pts[:, :2], 2), axis=0, return_index=True)
+    return tuple(map(tuple, pts[np.sort(keep)].tolist()))
+
+def baked_path(letter_char):
+    return os.path.join(BAKED_DIR, f"letter_points_{letter_char}.npz")
+
+def load_letter_points(letter_char, scale=1.0, spacing=2.5):
+    """Letter points as an (N, 3) array: the baked file when it was baked with
+    the same scale/spacing, otherwise generated live"""
+    try:
+        with np.load(baked_path(letter_char)) as baked:
+            if float(baked["scale"]) == scale and float(baked["spacing"]) == spacing:
+                return baked["pts"]
+    except (OSError, KeyError):
+        pass
+    return np.array(generate_letter_points(letter_char, scale, spacing), dtype=float).reshape(-1, 3)
@@ -1,5 +1,43 @@
-from vpython import *
-import random, math
+import os, sys, random, math
+from multiprocessing import Pool
+import numpy as np
+
+# --ensemble N: N независимых прогонов без графики, по процессу на прогон
+HEADLESS = "--ensemble" in sys.argv
+
+if HEADLESS:
+    class NullRenderer:
+        """Заглушка для canvas/sphere/label/curve: принимает всё и ничего не рисует"""
+        def __init__(self, *args, **kwargs):
+            self.__dict__.update(kwargs)
+
+        def __getattr__(self, name):
+            return self
+
+        def __call__(self, *args, **kwargs):
+            return self
+
+    canvas = sphere = label = curve = color = NullRenderer()
+
+    def vector(x=0.0, y=0.0, z=0.0):
+        return np.array((x, y, z), dtype=float)
+
+    def rate(_):
+        pass
+else:
+    # vpython поднимает сервер и браузер уже при импорте
+    from vpython import *
+    # star-import перекрывает модули random/math одноимёнными функциями vpython
+    import random, math
+
+try:
+    from numba import njit, prange
+except ImportError:  # без numba ядро выполняется как обычный Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+    prange = range
 
 # === ПАРАМЕТРЫ ===
 NUM_SATELLITES = 30
@@ -10,7 +48,14 @@ F_MAX_SHARE = F_TOTAL / 3
 ICE_CONSUMPTION = 0.1
 SPEED = 0.2
 BOND_RADIUS = 15
-BASE_POS = vector(0, 0, 0)
+NEIGHBOR_RADIUS = 6     # радиус усреднения движения free спутников
+BOUNDARY = 25           # граница отражения по каждой оси
+FLOCK_EVERY = 4         # период (в кадрах) усреднения движения free
+WEAK_EVERY = 10         # период помощи слабым
+RESCUE_EVERY = 30       # период назначения спасателей
+LINKS_EVERY = 6         # период перерисовки связей триплетов
+BASE = np.zeros(3)
+BASE_POS = vector(*BASE)
 
 # === СЦЕНА ===
 scene = canvas(title="Swarm 3D Simulation with Alpha-AI (Fixed)",
@@ -21,6 +66,9 @@ scene.camera.axis = vector(0, 0, -60)
 # Визуализация базы
 base_marker = sphere(pos=BASE_POS, radius=1.5, color=color.green, opacity=0.3)
 
+# === СТАТУСЫ (коды для массива int8) ===
+FREE, BUILDER, BEACON, RETURNING, RESCUE, WEAK, DEAD = range(7)
+
 # === ЦВЕТА ===
 COLORS = {
     "free": color.white,
@@ -33,108 +81,185 @@ COLORS = {
     "rescue": color.yellow,
     "weak": vector(0.5, 0.5, 0.5)
 }
+STATUS_COLORS = {
+    FREE: COLORS["free"],
+    BUILDER: COLORS["builder"],
+    BEACON: COLORS["beacon"],
+    RETURNING: COLORS["returning"],
+    RESCUE: COLORS["rescue"],
+    WEAK: COLORS["weak"],
+    DEAD: COLORS["dead"],
+}
+
+# === РОЛИ BEACON'ОВ (коды для массива int8) ===
+NO_ROLE, COMMANDER, RESERVER = range(3)
+ROLE_NAMES = (None, "commander", "reserver")
+ROLE_CODES = {name: code for code, name in enumerate(ROLE_NAMES)}
+
+# === СОСТОЯНИЕ РОЯ (SoA: по массиву на каждое поле) ===
+# float32 хватает с запасом для границ ±25 и шага SPEED, вдвое меньше памяти
+positions = np.zeros((NUM_SATELLITES, 3), dtype=np.float32)
+velocities = np.zeros((NUM_SATELLITES, 3), dtype=np.float32)
+fuels = np.full(NUM_SATELLITES, F_TOTAL, dtype=np.float32)
+statuses = np.full(NUM_SATELLITES, FREE, dtype=np.int8)
+roles = np.full(NUM_SATELLITES, NO_ROLE, dtype=np.int8)
+# Связи как индексы (-1 = нет): цель спасения и пара beacon'ов builder'а
+target_idx = np.full(NUM_SATELLITES, -1, dtype=np.int32)
+beacon_c = np.full(NUM_SATELLITES, -1, dtype=np.int32)
+beacon_r = np.full(NUM_SATELLITES, -1, dtype=np.int32)
+
+def random_velocity():
+    return (random.uniform(-1, 1), random.uniform(-1, 1), random.uniform(-1, 1))
+
+def dist2(a, b):
+    """Квадрат расстояния между двумя точками (без sqrt)"""
+    d = a - b
+    return float(d @ d)
+
+# === ПРОСТРАНСТВЕННЫЙ ХЕШ ===
+class SpatialHash:
+    """Равномерная сетка ячеек: поиск соседей без перебора всех пар"""
+    def __init__(self, cell):
+        self.cell = cell
+        self.grid = {}
+        self.points = None
+
+    def _key(self, p):
+        c = self.cell
+        return (int(p[0] // c), int(p[1] // c), int(p[2] // c))
+
+    def rebuild(self, points):
+        self.grid.clear()
+        self.points = points
+        keys = np.floor_divide(points, self.cell).astype(np.int64)
+        for i, key in enumerate(map(tuple, keys.tolist())):
+            self.grid.setdefault(key, []).append(i)
+
+    def _cells(self, key, span, shell=False):
+        kx, ky, kz = key
+        for dx in range(-span, span + 1):
+            for dy in range(-span, span + 1):
+                for dz in range(-span, span + 1):
+                    if shell and max(abs(dx), abs(dy), abs(dz)) != span:
+                        continue
+                    bucket = self.grid.get((kx + dx, ky + dy, kz + dz))
+                    if bucket:
+                        yield bucket
+
+    def _within(self, idx, p, r2):
+        d = self.points[idx] - p
+        return idx[np.einsum("ij,ij->i", d, d) <= r2]
+
+    def query(self, p, r):
+        """Индексы точек в радиусе r от p (сравнение квадратов расстояний)"""
+        span = max(1, math.ceil(r / self.cell))
+        buckets = list(self._cells(self._key(p), span))
+        if not buckets:
+            return np.empty(0, dtype=np.intp)
+        return self._within(np.concatenate(buckets), p, r * r)
+
+    def nearest(self, p, accept):
+        """Индекс ближайшей точки с accept[i] == True, или None"""
+        if not self.grid:
+            return None
+        key = self._key(p)
+        # сколько колец ячеек нужно, чтобы покрыть всю занятую область
+        max_span = max(max(abs(k[a] - key[a]) for a in range(3)) for k in self.grid)
+        best, best_d2 = None, None
+        for span in range(0, max_span + 1):
+            for bucket in self._cells(key, span, shell=True):
+                idx = np.asarray(bucket)
+                idx = idx[accept[idx]]
+                if idx.size == 0:
+                    continue
+                d = self.points[idx] - p
+                d2 = np.einsum("ij,ij->i", d, d)
+                j = int(np.argmin(d2))
+                if best_d2 is None or d2[j] < best_d2:
+                    best, best_d2 = int(idx[j]), d2[j]
+            # всё в пределах span ячеек уже просмотрено
+            if best is not None and best_d2 <= (span * self.cell) ** 2:
+                break
+        return best
 
 # === КЛАСС СПУТНИКА ===
 class Satellite:
-    def __init__(self):
-        self.pos = vector(random.uniform(-20, 20),
+    """Тонкое представление спутника idx поверх массивов роя"""
+    def __init__(self, idx):
+        self.idx = idx
+        positions[idx] = (random.uniform(-20, 20),
                           random.uniform(-20, 20),
                           random.uniform(-20, 20))
-        self.vel = vector(random.uniform(-1, 1),
-                          random.uniform(-1, 1),
-                          random.uniform(-1, 1))
-        self.sphere = sphere(pos=self.pos, radius=0.8,
+        velocities[idx] = random_velocity()
+        fuels[idx] = F_TOTAL
+        statuses[idx] = FREE
+        self.sphere = sphere(pos=vector(*positions[idx].tolist()), radius=0.8,
                              color=color.white, make_trail=False)
-        self.label = label(pos=self.pos, text='100', 
+        self.label = label(pos=self.sphere.pos, text='100',
                           height=10, color=color.white, opacity=0)
-        self.fuel = F_TOTAL
-        self.status = "free"
         self.role = None
         self.target = None
         self.beacon_pair = None
 
-    def move(self):
-        # Beacon'ы не двигаются (ИСПРАВЛЕНО!)
-        if self.status == "beacon":
-            self.sphere.pos = self.pos
-            self.update_label()
-            # Минимальный расход для beacon'ов
-            self.fuel -= ICE_CONSUMPTION * 0.02
-            return
+    @property
+    def target(self):
+        t = target_idx[self.idx]
+        return satellites[t] if t >= 0 else None
 
-        # Builder двигается к центру между beacon'ами (ИСПРАВЛЕНО!)
-        if self.status == "builder" and self.beacon_pair:
-            commander, reserver = self.beacon_pair
-            target = (commander.pos + reserver.pos) / 2
-            self.move_to(target)
-        elif self.status == "rescue" and self.target:
-            # Движение к цели для спасения
-            self.move_to(self.target.pos)
-        elif self.status in ["returning", "weak"]:
-            # Возврат на базу
-            self.move_to(BASE_POS)
-        elif self.status == "free":
-            # Свободное перемещение
-            self.pos += norm(self.vel) * SPEED
-            self.sphere.pos = self.pos
+    @target.setter
+    def target(self, sat):
+        target_idx[self.idx] = -1 if sat is None else sat.idx
 
-        # --- отражение от границ ---
-        for axis in ['x', 'y', 'z']:
-            val = getattr(self.pos, axis)
-            if abs(val) > 25:
-                setattr(self.vel, axis, -getattr(self.vel, axis))
-
-        # --- расход топлива (ИСПРАВЛЕНО - разный для разных статусов) ---
-        if self.status != "beacon":
-            self.fuel -= ICE_CONSUMPTION
-        
-        # --- проверка состояния ---
-        if self.fuel <= 0 and self.status != "dead":
-            self.status = "dead"
-            self.sphere.color = COLORS["dead"]
-            self.vel = vector(0, 0, 0)
-        elif self.status == "free" and self.fuel < T_CRITICAL:
-            self.status = "weak"
-            self.sphere.color = COLORS["weak"]
-
-        # --- возврат на базу (ДОБАВЛЕНО) ---
-        if self.status == "returning" and mag(self.pos - BASE_POS) < 2:
-            self.fuel = F_TOTAL
-            self.status = "free"
-            self.vel = vector(random.uniform(-1, 1),
-                            random.uniform(-1, 1),
-                            random.uniform(-1, 1))
-            self.role = None
-            self.beacon_pair = None
-            self.sphere.color = COLORS["free"]
-
-        # --- спасение (ДОБАВЛЕНО) ---
-        if self.status == "rescue" and self.target:
-            if mag(self.pos - self.target.pos) < 2:
-                if self.fuel >= 20:
-                    transfer = min(20, self.fuel // 2)
-                    self.target.fuel = min(self.target.fuel + transfer, F_TOTAL)
-                    self.fuel -= transfer
-                    self.target.status = "free"
-                    self.target.vel = vector(random.uniform(-1, 1),
-                                            random.uniform(-1, 1),
-                                            random.uniform(-1, 1))
-                    self.target.sphere.color = COLORS["free"]
-                    self.status = "returning"
-                    self.target = None
-                    self.sphere.color = COLORS["returning"]
-
-        self.update_label()
-
-    def move_to(self, target):
-        direction = target - self.pos
-        if mag(direction) > 0.1:
-            self.vel = norm(direction)
-            self.pos += self.vel * SPEED
-            self.sphere.pos = self.pos
+    @property
+    def beacon_pair(self):
+        c = beacon_c[self.idx]
+        return [satellites[c], satellites[beacon_r[self.idx]]] if c >= 0 else None
+
+    @beacon_pair.setter
+    def beacon_pair(self, pair):
+        if pair:
+            beacon_c[self.idx], beacon_r[self.idx] = pair[0].idx, pair[1].idx
+        else:
+            beacon_c[self.idx] = beacon_r[self.idx] = -1
+
+    @property
+    def role(self):
+        return ROLE_NAMES[roles[self.idx]]
+
+    @role.setter
+    def role(self, name):
+        roles[self.idx] = ROLE_CODES[name]
+
+    @property
+    def pos(self):
+        return positions[self.idx]
+
+    @property
+    def vel(self):
+        return velocities[self.idx]
+
+    @vel.setter
+    def vel(self, value):
+        velocities[self.idx] = value
+
+    @property
+    def fuel(self):
+        return fuels[self.idx]
+
+    @fuel.setter
+    def fuel(self, value):
+        fuels[self.idx] = value
+
+    @property
+    def status(self):
+        return statuses[self.idx]
+
+    @status.setter
+    def status(self, value):
+        statuses[self.idx] = value
 
     def update_label(self):
-        self.label.pos = self.pos + vector(0, 1.5, 0)
+        self.label.pos = self.sphere.pos + vector(0, 1.5, 0)
         self.label.text = f'{int(self.fuel)}'
         # Цвет метки в зависимости от уровня топлива
         if self.fuel < T_CRITICAL:
@@ -144,101 +269,300 @@ class Satellite:
         else:
             self.label.color = color.white
 
+# === СТАЕВОЕ ДВИЖЕНИЕ FREE ===
+@njit(parallel=True, fastmath=True, cache=True)
+def _flock_kernel(pos, vel_in, vel_out, status, r2):
+    """Подмешивание средней скорости free соседей; читаем vel_in, пишем vel_out"""
+    for i in prange(pos.shape[0]):
+        if status[i] != FREE:
+            continue
+        ax = ay = az = 0.0
+        cnt = 0
+        for j in range(pos.shape[0]):
+            if j == i or status[j] != FREE:
+                continue
+            dx = pos[j, 0] - pos[i, 0]
+            dy = pos[j, 1] - pos[i, 1]
+            dz = pos[j, 2] - pos[i, 2]
+            if dx * dx + dy * dy + dz * dz < r2:
+                ax += vel_in[j, 0]
+                ay += vel_in[j, 1]
+                az += vel_in[j, 2]
+                cnt += 1
+        if cnt:
+            vx = vel_in[i, 0] + ax / cnt * 0.1
+            vy = vel_in[i, 1] + ay / cnt * 0.1
+            vz = vel_in[i, 2] + az / cnt * 0.1
+            n = math.sqrt(vx * vx + vy * vy + vz * vz)
+            if n > 0:
+                vel_out[i, 0] = vx / n
+                vel_out[i, 1] = vy / n
+                vel_out[i, 2] = vz / n
+            else:
+                vel_out[i, 0] = vel_out[i, 1] = vel_out[i, 2] = 0.0
+
+# === ШАГ РОЯ ===
+@njit(cache=True)
+def _emit(events, n, i, old, new):
+    events[n, 0] = i
+    events[n, 1] = old
+    events[n, 2] = new
+    return n + 1
+
+@njit(cache=True, fastmath=True)
+def _step_kernel(pos, vel, fuel, status, target_idx, beacon_c, beacon_r, events):
+    """Движение, отражение, расход топлива и переходы статусов за один кадр.
+
+    Каждая смена статуса пишется в events строкой (индекс, было, стало);
+    возвращает число записанных строк.
+    """
+    n = 0
+    for i in range(pos.shape[0]):
+        st = status[i]
+        # Beacon'ы не двигаются, минимальный расход
+        if st == BEACON:
+            fuel[i] -= ICE_CONSUMPTION * 0.02
+            continue
+
+        # --- цель движения ---
+        seek = True
+        if st == BUILDER and beacon_c[i] >= 0:
+            # Builder двигается к центру между beacon'ами
+            c = beacon_c[i]
+            r = beacon_r[i]
+            gx = (pos[c, 0] + pos[r, 0]) * 0.5
+            gy = (pos[c, 1] + pos[r, 1]) * 0.5
+            gz = (pos[c, 2] + pos[r, 2]) * 0.5
+        elif st == RESCUE and target_idx[i] >= 0:
+            t = target_idx[i]
+            gx, gy, gz = pos[t, 0], pos[t, 1], pos[t, 2]
+        elif st == RETURNING or st == WEAK:
+            gx, gy, gz = BASE[0], BASE[1], BASE[2]
+        else:
+            seek = False
+            gx = gy = gz = 0.0
+
+        if seek:
+            dx = gx - pos[i, 0]
+            dy = gy - pos[i, 1]
+            dz = gz - pos[i, 2]
+            d = math.sqrt(dx*dx + dy*dy + dz*dz)
+            if d > 0.1:
+                vel[i, 0] = dx / d
+                vel[i, 1] = dy / d
+                vel[i, 2] = dz / d
+                for k in range(3):
+                    pos[i, k] += vel[i, k] * SPEED
+        elif st == FREE:
+            v = math.sqrt(vel[i, 0]**2 + vel[i, 1]**2 + vel[i, 2]**2)
+            if v > 0:
+                for k in range(3):
+                    pos[i, k] += vel[i, k] / v * SPEED
+
+        # --- отражение от границ ---
+        for k in range(3):
+            if abs(pos[i, k]) > BOUNDARY:
+                vel[i, k] = -vel[i, k]
+
+        fuel[i] -= ICE_CONSUMPTION
+
+        # --- проверка состояния ---
+        if fuel[i] <= 0 and st != DEAD:
+            n = _emit(events, n, i, st, DEAD)
+            status[i] = DEAD
+            vel[i, 0] = vel[i, 1] = vel[i, 2] = 0.0
+        elif st == FREE and fuel[i] < T_CRITICAL:
+            n = _emit(events, n, i, st, WEAK)
+            status[i] = WEAK
+        st = status[i]
+
+        # --- возврат на базу ---
+        if st == RETURNING:
+            dx = pos[i, 0] - BASE[0]
+            dy = pos[i, 1] - BASE[1]
+            dz = pos[i, 2] - BASE[2]
+            if dx*dx + dy*dy + dz*dz < 4:
+                fuel[i] = F_TOTAL
+                n = _emit(events, n, i, RETURNING, FREE)
+                status[i] = FREE
+                for k in range(3):
+                    vel[i, k] = np.random.uniform(-1, 1)
+                beacon_c[i] = beacon_r[i] = -1
+
+        # --- спасение ---
+        if st == RESCUE and target_idx[i] >= 0:
+            t = target_idx[i]
+            dx = pos[i, 0] - pos[t, 0]
+            dy = pos[i, 1] - pos[t, 1]
+            dz = pos[i, 2] - pos[t, 2]
+            if dx*dx + dy*dy + dz*dz < 4 and fuel[i] >= 20:
+                transfer = min(20.0, fuel[i] // 2)
+                fuel[t] = min(fuel[t] + transfer, F_TOTAL)
+                fuel[i] -= transfer
+                if status[t] != FREE:
+                    n = _emit(events, n, t, status[t], FREE)
+                    status[t] = FREE
+                for k in range(3):
+                    vel[t, k] = np.random.uniform(-1, 1)
+                n = _emit(events, n, i, RESCUE, RETURNING)
+                status[i] = RETURNING
+                target_idx[i] = -1
+    return n
+
+# Буфер переходов ядра: за кадр у спутника не больше трёх смен статуса
+step_events = np.empty((3 * NUM_SATELLITES, 3), dtype=np.int32)
+
+def step_all(sats):
+    """Шаг ядра; Python обрабатывает только переходы статусов из step_events"""
+    n = _step_kernel(positions, velocities, fuels, statuses,
+                     target_idx, beacon_c, beacon_r, step_events)
+    for i, old, new in step_events[:n].tolist():
+        alpha.moved(i, old, new)
+        s = sats[i]
+        if old == RETURNING and new == FREE:
+            s.role = None
+        s.sphere.color = STATUS_COLORS[new]
+
+def render(sats):
+    """Перенос положений из массивов в объекты vpython"""
+    for s in sats:
+        s.sphere.pos = vector(*positions[s.idx].tolist())
+        s.update_label()
+
 # === КЛАСС АЛЬФА-ИИ ===
 class AlphaAI:
     def __init__(self, satellites):
         self.sats = satellites
-        self.links = []
+        # Пул переиспользуемых кривых связей (3 на триплет) вместо новых каждый кадр
+        self.links = [self.new_link() for _ in range(NUM_SATELLITES)]
+        self.links_shown = 0
         self.counter = 0
+        self.grid = SpatialHash(NEIGHBOR_RADIUS)
+        # Индексы спутников по статусам, меняются только при переходах
+        self.by_status = {st: set() for st in STATUS_COLORS}
+        for i, st in enumerate(statuses):
+            self.by_status[st].add(i)
+
+    def set_status(self, sat, new):
+        """Единственная точка смены статуса вне ядра шага"""
+        self.moved(sat.idx, sat.status, new)
+        sat.status = new
+
+    def moved(self, i, old, new):
+        """Перенос индекса i между множествами by_status"""
+        self.by_status[old].discard(i)
+        self.by_status[new].add(i)
+
+    def new_link(self):
+        return curve(pos=[vector(0, 0, 0), vector(0, 0, 0)], radius=0.05, visible=False)
+
+    def draw_link(self, k, a, b, col):
+        """Показать k-ю кривую пула между точками a и b"""
+        if k == len(self.links):
+            self.links.append(self.new_link())
+        link = self.links[k]
+        link.modify(0, pos=a, color=col)
+        link.modify(1, pos=b, color=col)
+        link.visible = True
 
     def find_dead(self):
-        return [s for s in self.sats if s.status == "dead"]
+        return [self.sats[i] for i in self.by_status[DEAD]]
 
     def find_free(self):
-        return [s for s in self.sats if s.status == "free" and s.fuel >= T_LOW]
+        return [self.sats[i] for i in self.by_status[FREE] if fuels[i] >= T_LOW]
 
     def find_weak(self):
-        return [s for s in self.sats if s.status == "weak"]
+        return [self.sats[i] for i in self.by_status[WEAK]]
 
     def regulate(self):
         self.counter += 1
-        
-        # --- очистка старых связей ---
-        for l in self.links:
-            l.visible = False
-        self.links.clear()
+
+        frame = self.counter
+
+        # --- сетка соседей: только в кадры, где её кто-то читает ---
+        if (frame % WEAK_EVERY == 0 or frame % RESCUE_EVERY == 0
+                or frame % TRIPLET_FORMATION_INTERVAL == 0):
+            self.grid.rebuild(positions)
 
         # --- усреднение движения для free спутников ---
-        for s in self.sats:
-            if s.status == "free":
-                neighbors = [o for o in self.sats 
-                           if mag(o.pos - s.pos) < 6 and o != s and o.status == "free"]
-                if neighbors:
-                    avg_dir = sum([o.vel for o in neighbors], vector(0,0,0)) / len(neighbors)
-                    s.vel = norm(s.vel + avg_dir * 0.1)
+        # все free читают скорости начала кадра, поэтому порядок не важен
+        if frame % FLOCK_EVERY == 0:
+            _flock_kernel(positions, velocities.copy(), velocities, statuses,
+                          NEIGHBOR_RADIUS ** 2)
 
         # --- регулировка топлива в триплетах (ИСПРАВЛЕНО!) ---
-        builders = [s for s in self.sats if s.status == "builder"]
-        for b in builders:
+        for i in list(self.by_status[BUILDER]):
+            b = self.sats[i]
             if b.fuel < T_LOW:
                 if not self.refuel(b):
                     # Не удалось заправить - возврат на базу
-                    b.status = "returning"
+                    self.set_status(b, RETURNING)
                     b.beacon_pair = None
                     b.sphere.color = COLORS["returning"]
 
         # --- спасение мертвых (ДОБАВЛЕНО) ---
-        if self.counter % 30 == 0:  # Каждые 30 кадров
+        if frame % RESCUE_EVERY == 0:
             self.prioritize_rescue()
 
         # --- помощь слабым (ДОБАВЛЕНО) ---
-        weak = self.find_weak()
+        weak = self.find_weak() if frame % WEAK_EVERY == 0 else ()
         for w in weak:
-            # Ищем ближайший reserver beacon с топливом
-            reservers = [s for s in self.sats 
-                        if s.status == "beacon" and s.role == "reserver" 
-                        and s.fuel > F_TOTAL * 0.33]
-            if reservers:
-                nearest = min(reservers, key=lambda r: mag(r.pos - w.pos))
-                if mag(w.pos - nearest.pos) < 3:
-                    transfer = min(F_MAX_SHARE, nearest.fuel - T_CRITICAL)
-                    if transfer > 0:
-                        nearest.fuel -= transfer
-                        w.fuel = min(w.fuel + transfer, F_TOTAL)
-                        w.status = "free"
-                        w.sphere.color = COLORS["free"]
+            # Ищем ближайший reserver beacon с топливом в радиусе передачи
+            near = self.grid.query(w.pos, 3)
+            reservers = near[(statuses[near] == BEACON) & (roles[near] == RESERVER)
+                             & (fuels[near] > F_TOTAL * 0.33)]
+            if reservers.size:
+                d = positions[reservers] - w.pos
+                nearest = self.sats[reservers[np.argmin(np.einsum("ij,ij->i", d, d))]]
+                transfer = min(F_MAX_SHARE, nearest.fuel - T_CRITICAL)
+                if transfer > 0:
+                    nearest.fuel -= transfer
+                    w.fuel = min(w.fuel + transfer, F_TOTAL)
+                    self.set_status(w, FREE)
+                    w.sphere.color = COLORS["free"]
 
         # --- визуализация связей триплета ---
+        if frame % LINKS_EVERY == 0:
+            self.draw_links()
+
+    def draw_links(self):
+        """Показать связи всех триплетов, лишние кривые пула спрятать"""
+        k = 0
         for s in self.sats:
             if s.beacon_pair:
                 c, r = s.beacon_pair
-                self.links.append(curve(pos=[s.pos, c.pos], color=color.green, radius=0.05))
-                self.links.append(curve(pos=[s.pos, r.pos], color=color.green, radius=0.05))
-                self.links.append(curve(pos=[c.pos, r.pos], color=color.cyan, radius=0.05))
+                self.draw_link(k, s.sphere.pos, c.sphere.pos, color.green)
+                self.draw_link(k + 1, s.sphere.pos, r.sphere.pos, color.green)
+                self.draw_link(k + 2, c.sphere.pos, r.sphere.pos, color.cyan)
+                k += 3
+        # скрываем только те кривые, что были видны при прошлой отрисовке
+        for link in self.links[k:self.links_shown]:
+            link.visible = False
+        self.links_shown = k
 
     def refuel(self, builder):
         """ИСПРАВЛЕНО: топливо только builder'у, как в 2D"""
         if not builder.beacon_pair:
             return False
-        
+
         commander, reserver = builder.beacon_pair
-        
+
         if reserver.fuel > F_TOTAL * 0.33:
             transfer = min(F_MAX_SHARE, reserver.fuel * 0.5)
             transfer = min(transfer, reserver.fuel - T_CRITICAL)
-            
+
             if transfer <= 0:
                 return False
-            
+
             reserver.fuel -= transfer
             builder.fuel = min(builder.fuel + transfer, F_TOTAL)
-            
+
             # Переоценка ролей
             if commander.fuel < reserver.fuel:
                 commander.role, reserver.role = reserver.role, commander.role
                 commander.sphere.color = COLORS["reserver"]
                 reserver.sphere.color = COLORS["commander"]
-            
+
             return True
         else:
             return False
@@ -248,36 +572,45 @@ class AlphaAI:
         dead = self.find_dead()
         if not dead:
             return
-        
-        free = [s for s in self.sats if s.status == "free" and s.fuel > T_LOW]
+
+        free = (statuses == FREE) & (fuels > T_LOW)
         for victim in dead[:min(3, len(dead))]:  # Не более 3 одновременно
-            if not free:
+            if not free.any():
                 break
-            rescuer = min(free, key=lambda s: mag(s.pos - victim.pos))
-            rescuer.status = "rescue"
+            rescuer = self.sats[self.grid.nearest(victim.pos, free)]
+            self.set_status(rescuer, RESCUE)
             rescuer.target = victim
             rescuer.sphere.color = COLORS["rescue"]
-            free.remove(rescuer)
+            free[rescuer.idx] = False
 
 # === СОЗДАНИЕ ТРИПЛЕТА ===
-def form_triplet(sats, bond_radius=BOND_RADIUS):
-    free = [s for s in sats if s.status == "free" and s.fuel >= T_LOW]
+def form_triplet(sats, bond_radius=BOND_RADIUS, grid=None):
+    free = np.flatnonzero((statuses == FREE) & (fuels >= T_LOW))
     if len(free) < 3:
         return None
-    
-    s1 = random.choice(free)
-    neighbors = [s for s in free if s != s1 and mag(s.pos - s1.pos) <= bond_radius]
-    if len(neighbors) < 2:
+
+    i1 = random.choice(free)
+    if grid is not None and grid.grid:
+        # Сетка построена в начале кадра: запас 2*SPEED на смещение за кадр
+        near = grid.query(positions[i1], bond_radius + 2 * SPEED)
+        candidates = near[(statuses[near] == FREE) & (fuels[near] >= T_LOW)]
+    else:
+        candidates = free
+    candidates = candidates[candidates != i1]
+    d = positions[candidates] - positions[i1]
+    d2 = np.einsum("ij,ij->i", d, d)
+    close = d2 <= bond_radius * bond_radius
+    if np.count_nonzero(close) < 2:
         return None
-    
-    neighbors.sort(key=lambda s: mag(s.pos - s1.pos))
-    triplet = [s1, neighbors[0], neighbors[1]]
-    
+
+    neighbors = candidates[close][np.argsort(d2[close], kind="stable")]
+    triplet = [sats[i1], sats[neighbors[0]], sats[neighbors[1]]]
+
     # Назначение ролей
-    triplet[0].status = "builder"
-    triplet[1].status = "beacon"
-    triplet[2].status = "beacon"
-    
+    alpha.set_status(triplet[0], BUILDER)
+    alpha.set_status(triplet[1], BEACON)
+    alpha.set_status(triplet[2], BEACON)
+
     # Роли по уровню топлива
     if triplet[1].fuel < triplet[2].fuel:
         triplet[1].role = "commander"
@@ -285,46 +618,93 @@ def form_triplet(sats, bond_radius=BOND_RADIUS):
     else:
         triplet[1].role = "reserver"
         triplet[2].role = "commander"
-    
+
     # ИСПРАВЛЕНО: обнуляем скорость beacon'ов!
-    triplet[1].vel = vector(0, 0, 0)
-    triplet[2].vel = vector(0, 0, 0)
-    
+    triplet[1].vel = 0
+    triplet[2].vel = 0
+
     # Связь builder'а с beacon'ами
     triplet[0].beacon_pair = [triplet[1], triplet[2]]
-    
+
     # Цена формирования
     for s in triplet:
         s.fuel -= T_LOW * 0.2
-    
+
     # Обновление цветов
     triplet[0].sphere.color = COLORS["builder"]
     triplet[1].sphere.color = COLORS["commander"] if triplet[1].role == "commander" else COLORS["reserver"]
     triplet[2].sphere.color = COLORS["commander"] if triplet[2].role == "commander" else COLORS["reserver"]
-    
-    return triplet
 
-# === ИНИЦИАЛИЗАЦИЯ ===
-satellites = [Satellite() for _ in range(NUM_SATELLITES)]
-alpha = AlphaAI(satellites)
+    return triplet
 
-# Формируем начальный триплет
-form_triplet(satellites)
+@njit(cache=True)
+def _seed_kernel(seed):
+    """У numba свой генератор: np.random.seed снаружи ядра на него не влияет"""
+    np.random.seed(seed)
 
-# === СЧЕТЧИК КАДРОВ ДЛЯ ПЕРИОДИЧЕСКОГО ФОРМИРОВАНИЯ ===
-frame_counter = 0
+# === ЗАПУСК СИМУЛЯЦИИ ===
 TRIPLET_FORMATION_INTERVAL = 120  # Каждые 2 секунды при 60 fps
 
-# === ГЛАВНЫЙ ЦИКЛ ===
-while True:
-    rate(60)
-    frame_counter += 1
-    
-    alpha.regulate()
-    
-    for s in satellites:
-        s.move()
-    
-    # Периодическое формирование новых триплетов
-    if frame_counter % TRIPLET_FORMATION_INTERVAL == 0:
-        form_triplet(satellites, BOND_RADIUS)
\ No newline at end of file
+def run_sim(seed=None, frames=None, headless=HEADLESS):
+    """Один прогон: frames кадров (None = бесконечно), возвращает итоговые метрики"""
+    global satellites, alpha
+    if seed is not None:
+        random.seed(seed)
+        _seed_kernel(seed)
+
+    # === ИНИЦИАЛИЗАЦИЯ ===
+    satellites = [Satellite(i) for i in range(NUM_SATELLITES)]
+    alpha = AlphaAI(satellites)
+
+    # Формируем начальный триплет
+    form_triplet(satellites)
+
+    # === ГЛАВНЫЙ ЦИКЛ ===
+    frame_counter = 0
+    while frames is None or frame_counter < frames:
+        if not headless:
+            rate(60)
+        frame_counter += 1
+
+        alpha.regulate()
+
+        step_all(satellites)
+        if not headless:
+            render(satellites)
+
+        # Периодическое формирование новых триплетов
+        if frame_counter % TRIPLET_FORMATION_INTERVAL == 0:
+            form_triplet(satellites, BOND_RADIUS, alpha.grid)
+
+    counts = np.bincount(statuses, minlength=DEAD + 1)
+    return {
+        "seed": seed,
+        "frames": frame_counter,
+        "free": int(counts[FREE]),
+        "builder": int(counts[BUILDER]),
+        "beacon": int(counts[BEACON]),
+        "returning": int(counts[RETURNING]),
+        "rescue": int(counts[RESCUE]),
+        "weak": int(counts[WEAK]),
+        "dead": int(counts[DEAD]),
+        "avg_fuel": float(fuels.mean()),
+    }
+
+def _run_headless(seed, frames):
+    return run_sim(seed, frames, headless=True)
+
+def run_ensemble(seeds, frames):
+    """Независимые прогоны параллельно: отдельные процессы, а не потоки"""
+    with Pool(os.cpu_count()) as pool:
+        return pool.starmap(_run_headless, [(seed, frames) for seed in seeds])
+
+if __name__ == "__main__":
+    if HEADLESS:
+        args = sys.argv[1:]
+        runs = int(args[args.index("--ensemble") + 1])
+        frames = int(args[args.index("--frames") + 1]) if "--frames" in args else 3600
+        for m in run_ensemble(range(runs), frames):
+            print(" ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+                           for k, v in m.items()))
+    else:
+        run_sim()
@@ -1,9 +1,10 @@
 # swarm3d_alpha_v04.py
 # Swarm 3D v0.4 — Alpha AI + construction of a letter (A implemented)
-# Requires: pip install vpython
+# Requires: pip install vpython numpy
 
 from vpython import *
 import random, math, sys
+import numpy as np
 
 # === PARAMETERS ===
 NUM_SATELLITES = 40
@@ -14,6 +15,7 @@ F_MAX_SHARE = F_TOTAL / 3
 ICE_CONSUMPTION = 0.03
 SPEED = 0.4
 BOND_RADIUS = 8
+WORLD_BOUND = 60  # velocity reflects past this on each axis
 BASE_POS = vector(0, 0, 0)
 BUILD_SCALE = 1.0  # base unit for building shape; final scale uses BUILD_SCALE * 15 (1:15 relation)
 
@@ -46,6 +48,16 @@ letter = input("Enter an uppercase English letter to build (A for now) [default
 if not letter:
     letter = "A"
 
+# helper: squared distance for proximity tests (no sqrt)
+def dist2(a, b):
+    dx = a.x - b.x
+    dy = a.y - b.y
+    dz = a.z - b.z
+    return dx*dx + dy*dy + dz*dz
+
+def _mag(v):
+    return math.sqrt(v.x*v.x + v.y*v.y + v.z*v.z)
+
 # helper: generate target points in plane z=0 for letter
 def generate_letter_points(letter_char, scale=BUILD_SCALE, spacing=2.5):
     """
@@ -144,16 +156,22 @@ class Satellite:
 
     def move_to(self, tgt_pos):
         dir = tgt_pos - self.pos
-        if mag(dir) < 0.5:
+        m = _mag(dir)
+        if m < 0.5:
             return
-        self.vel = norm(dir)
-        self.pos += self.vel * SPEED
+        # normalize into the existing vel vector instead of allocating via norm()
+        vel = self.vel
+        vel.x, vel.y, vel.z = dir.x/m, dir.y/m, dir.z/m
+        self.pos += vel * SPEED
         self.sphere.pos = self.pos
         self.label.pos = self.pos + vector(0,1.3,0)
 
     def random_roam(self):
         # small wander
-        self.pos += norm(self.vel) * SPEED
+        v = self.vel
+        m = _mag(v)
+        if m > 0:
+            self.pos += vector(v.x/m*SPEED, v.y/m*SPEED, v.z/m*SPEED)
         self.sphere.pos = self.pos
         self.label.pos = self.pos + vector(0,1.3,0)
 
@@ -183,10 +201,13 @@ class Satellite:
             self.random_roam()
 
         # boundaries bounce
-        for axis in ['x','y','z']:
-            val = getattr(self.pos, axis)
-            if abs(val) > 60:
-                setattr(self.vel, axis, -getattr(self.vel, axis))
+        pos, vel = self.pos, self.vel
+        if abs(pos.x) > WORLD_BOUND:
+            vel.x = -vel.x
+        if abs(pos.y) > WORLD_BOUND:
+            vel.y = -vel.y
+        if abs(pos.z) > WORLD_BOUND:
+            vel.z = -vel.z
         # fuel consumption
         if self.status != "beacon":
             self.fuel -= ICE_CONSUMPTION
@@ -212,15 +233,14 @@ class Satellite:
         self.sphere.pos = self.pos
         self.update_label()
 
-# === Swarm initialization ===
-satellites = [Satellite(i) for i in range(NUM_SATELLITES)]
-
 # Alpha AI
 class AlphaAI:
     def __init__(self, satellites):
         self.sat = satellites
         self.visual = sphere(pos=BASE_POS + vector(0, -5, 0), radius=1.0, color=COLORS["alpha"], emissive=True, opacity=0.6)
-        self.links = []  # curves showing influence
+        # pooled curves showing influence, reused every frame instead of recreated
+        self.links = [self.new_link() for _ in range(NUM_SATELLITES)]
+        self.links_shown = 0
         self.counter = 0
         self.bond_radius = BOND_RADIUS
         self.triplet_interval_frames = 120  # frames between attempts
@@ -237,22 +257,32 @@ class AlphaAI:
         instability = (weak + dead) / max(1, len(self.sat))
         return {"avg": avg, "free": free, "builder": builder, "beacon": beacon, "dead": dead, "weak": weak, "instability": instability}
 
+    def new_link(self):
+        return curve(pos=[vector(0,0,0), vector(0,0,0)], color=COLORS["alpha"], radius=0.05, opacity=0.3, visible=False)
+
     def visualize_influence(self):
-        # clear old
-        for l in self.links:
-            l.visible = False
-        self.links.clear()
         # draw links from alpha to low-fuel satellites
+        k = 0
         for s in self.sat:
             if s.fuel < T_LOW and s.status != "dead":
-                self.links.append(curve(pos=[self.visual.pos, s.pos], color=COLORS["alpha"], radius=0.05, opacity=0.3))
+                if k == len(self.links):
+                    self.links.append(self.new_link())
+                link = self.links[k]
+                link.modify(0, pos=self.visual.pos)
+                link.modify(1, pos=s.pos)
+                link.visible = True
+                k += 1
+        # hide only the curves that were shown last frame
+        for link in self.links[k:self.links_shown]:
+            link.visible = False
+        self.links_shown = k
 
     def regulate(self, frame):
         self.counter += 1
         tm = self.telemetry()
 
         # move alpha visual to swarm center slowly
-        center = sum([s.pos for s in self.sat], vector(0,0,0)) / len(self.sat)
+        center = vector(*np.mean([(s.pos.x, s.pos.y, s.pos.z) for s in self.sat], axis=0))
         self.visual.pos = self.visual.pos * 0.95 + center * 0.05
 
         # If instability high, expand bond radius and prompt restructure
@@ -310,7 +340,7 @@ class AlphaAI:
         for victim in dead[:min(3, len(dead))]:
             if not free:
                 break
-            rescuer = min(free, key=lambda s: mag(s.pos - victim.pos))
+            rescuer = min(free, key=lambda s: dist2(s.pos, victim.pos))
             rescuer.status = "rescue"
             rescuer.target = victim
             rescuer.sphere.color = COLORS["rescue"]
@@ -324,7 +354,7 @@ class AlphaAI:
         free = [s for s in self.sat if s.status == "free"]
         random.shuffle(free)
         for s in free[:min(len(free), len(unbuilt))]:
-            nearest = min(unbuilt, key=lambda t: mag(t["pos"] - s.pos))
+            nearest = min(unbuilt, key=lambda t: dist2(t["pos"], s.pos))
             # nudging velocity
             dir = norm(nearest["pos"] - s.pos)
             s.vel = s.vel * 0.6 + dir * 0.4
@@ -335,10 +365,11 @@ def form_triplet(bond_radius=BOND_RADIUS):
     if len(free) < 3:
         return None
     s1 = random.choice(free)
-    neighbors = [s for s in free if s is not s1 and mag(s.pos - s1.pos) <= bond_radius]
+    bond_r2 = bond_radius * bond_radius
+    neighbors = [s for s in free if s is not s1 and dist2(s.pos, s1.pos) <= bond_r2]
     if len(neighbors) < 2:
         return None
-    neighbors.sort(key=lambda s: mag(s.pos - s1.pos))
+    neighbors.sort(key=lambda s: dist2(s.pos, s1.pos))
     s2, s3 = neighbors[0], neighbors[1]
     triplet = [s1, s2, s3]
     # assign roles
@@ -397,11 +428,11 @@ def building_step():
                 s.status = "returning"
                 s.beacon_pair = None
                 continue
-            nearest = min(unbuilt, key=lambda t: mag(t["pos"] - s.pos))
+            nearest = min(unbuilt, key=lambda t: dist2(t["pos"], s.pos))
             # move to it
             s.move_to(nearest["pos"])
             # if arrived, mark built
-            if mag(s.pos - nearest["pos"]) < 1.0:
+            if dist2(s.pos, nearest["pos"]) < 1.0:
                 nearest["built"] = True
                 nearest["sphere"].color = color.white
                 nearest["sphere"].opacity = 0.9
@@ -1,9 +1,21 @@
 # swarm3d_alpha_v06.py
 # Swarm 3D v0.6 — Improved Alpha AI + construction
-# Requires: pip install vpython
+# Requires: pip install vpython numpy scipy (numba optional, speeds up the physics step)
 
 from vpython import *
-import random, math, sys
+import math, sys, time
+import numpy as np
+from scipy.spatial import cKDTree
+from letters import load_letter_points
+
+try:
+    from numba import njit, prange
+except ImportError:  # without numba the physics kernel runs as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+    prange = range
 
 # === PARAMETERS ===
 NUM_SATELLITES = 40
@@ -14,9 +26,13 @@ F_MAX_SHARE = F_TOTAL / 3
 ICE_CONSUMPTION = 0.03
 SPEED = 0.4
 BOND_RADIUS = 8
+WORLD_BOUND = 60                 # velocity reflects past this on each axis
 BASE_POS = vector(0, 0, 0)
 BUILD_SCALE = 1.0
 ARRIVAL_RADIUS = 2.5
+ARRIVAL_RADIUS2 = ARRIVAL_RADIUS * ARRIVAL_RADIUS
+DOCK_RADIUS2 = 3.0 * 3.0         # base / rescue / reserver contact distance, squared
+TREE_SLACK = 2 * SPEED           # query margin: the free-satellite k-d tree may be one step old
 
 # New parameters for improvements
 PRIORITY_WEIGHT = 0.7
@@ -25,6 +41,25 @@ STRATEGY_CHANGE_INTERVAL = 600  # Increased from 300
 STATIONED_CHANCE = 0.3
 GOAL_REVISION_INTERVAL = 30     # Frames between goal reconsideration
 MIN_RESCUE_FUEL = 10           # Minimum fuel for rescue transfer
+FUEL_SCALE = 100               # state.fuel is int16 fixed point: 1 = 0.01 fuel
+ICE_DRAIN = round(ICE_CONSUMPTION * FUEL_SCALE)    # per-step drain, fixed point
+FUEL_FLOOR = -F_TOTAL * FUEL_SCALE                 # dead satellites keep draining; stop well clear of int16 wrap
+# holding satellites drain a fraction of a fixed-point unit per step: one unit every N steps
+STATIONED_DRAIN_EVERY = round(1 / (ICE_CONSUMPTION * 0.01 * FUEL_SCALE))
+BEACON_DRAIN_EVERY = round(1 / (ICE_CONSUMPTION * 0.02 * FUEL_SCALE))
+PROGRESS_FULL = 255            # target build progress is uint8; this is complete
+PROGRESS_STEP = 13             # ~5% per step on target
+TARGET_CANDIDATES = 4          # Best-scored targets a builder checks against other builders
+SHOW_LABELS = NUM_SATELLITES < 50  # Per-satellite fuel labels; text is costly for big swarms
+MIN_RENDER_MOVE2 = 0.01 ** 2   # Skip sphere.pos writes for smaller (squared) moves
+PHYS_DT = 1 / 60               # Fixed physics/AI step; all frame cadences count these steps
+MAX_PHYS_STEPS = 4             # Catch-up limit per rendered frame, so a slow renderer can't stall the sim
+SPAWN_LOW = (-40, -5, -40)     # Initial scatter box
+SPAWN_HIGH = (40, 30, 40)
+VEL_SPREAD = np.array([1, 0.3, 1], dtype=np.float32)  # Random velocity half-range per axis
+
+# one generator for all random draws
+rng = np.random.default_rng()
 
 # === SCENE ===
 scene = canvas(title="Swarm 3D v0.6 — Improved Alpha AI + Construction",
@@ -51,287 +86,359 @@ COLORS = {
     "stationed": vector(0, 1, 0.5)
 }
 
+# status codes (ints: each status test is a plain int compare)
+FREE, BUILDER, BEACON, RETURNING, DEAD, RESCUE, WEAK, STATIONED = range(8)
+STATUS_NAMES = ("free", "builder", "beacon", "returning", "dead", "rescue", "weak", "stationed")
+STATUS_COLORS = [COLORS[name] for name in STATUS_NAMES]
+
 # prompt for letter
 letter = input("Enter an uppercase English letter to build (A for now) [default A]: ").strip().upper()
 if not letter:
     letter = "A"
 
-# === Priority calculation strategies ===
-BUILD_STRATEGIES = {
-    "bottom_up": lambda pos: -pos.y,
-    "top_down": lambda pos: pos.y,
-    "left_right": lambda pos: pos.x,
-    "center_out": lambda pos: -mag(pos),
-    "random": lambda pos: random.random()
-}
+# helper: squared distance for proximity tests (no sqrt)
+def dist2(a, b):
+    dx = a.x - b.x
+    dy = a.y - b.y
+    dz = a.z - b.z
+    return dx*dx + dy*dy + dz*dz
 
-current_strategy = "bottom_up"
+def xyz(v):
+    return (v.x, v.y, v.z)
 
-def calculate_priority(pos, strategy="bottom_up"):
-    """Calculate priority based on strategy"""
-    return BUILD_STRATEGIES.get(strategy, BUILD_STRATEGIES["bottom_up"])(pos)
+def random_vel():
+    """Fresh roaming velocity, written straight into a state.vel row"""
+    return rng.uniform(-1, 1, 3) * VEL_SPREAD
 
-# helper: generate target points
-def generate_letter_points(letter_char, scale=BUILD_SCALE, spacing=2.5):
-    """Generate points for letter construction"""
-    pts = []
-    s = scale * spacing * 1.0
-    
-    if letter_char == "A":
-        height = 8 * s
-        half_width = 3 * s
-        # left leg
-        for i in range(0, 9):
-            t = i / 8.0
-            x = -half_width * (1 - t)
-            y = -height/2 + t * height
-            pts.append(vector(x, y, 0))
-        # right leg
-        for i in range(0, 9):
-            t = i / 8.0
-            x = half_width * (1 - t)
-            y = -height/2 + t * height
-            pts.append(vector(x, y, 0))
-        # crossbar
-        for i in range(-2, 3):
-            x = i * s
-            y = 0
-            pts.append(vector(x, y, 0))
-        # interior fill
-        for rx in [-1, 0, 1]:
-            for ry in [1, 2, 3]:
-                pts.append(vector(rx * s, ry * s - height/2 + 2*s, 0))
-    else:
-        # fallback: rectangle
-        w = 8 * s
-        h = 10 * s
-        steps = 14
-        for i in range(steps+1):
-            t = i/steps
-            pts.append(vector(-w/2 + t*w, -h/2, 0))
-            pts.append(vector(-w/2 + t*w, h/2, 0))
-            pts.append(vector(-w/2, -h/2 + t*h, 0))
-            pts.append(vector(w/2, -h/2 + t*h, 0))
-    
-    # deduplicate
-    uniq = []
-    seen = set()
-    for p in pts:
-        key = (round(p.x,2), round(p.y,2))
-        if key not in seen:
-            seen.add(key)
-            uniq.append(p)
-    return uniq
+# === Priority calculation strategies ===
+# each strategy is one row of PRIORITIES, computed once the targets exist
+STRATEGY_NAMES = ("bottom_up", "top_down", "left_right", "center_out", "random")
+STRATEGY_IDX = {name: k for k, name in enumerate(STRATEGY_NAMES)}
+
+current_strategy = "bottom_up"
 
 # generate targets with 1:15 scale
 SCALE_1_15 = 15.0
-targets = generate_letter_points(letter, scale=BUILD_SCALE, spacing=1.2)
-targets = [vector(p.x * SCALE_1_15, p.y * SCALE_1_15, p.z * SCALE_1_15) for p in targets]
-
-# Calculate priority range for color normalization
-priorities = [calculate_priority(t, current_strategy) for t in targets]
-min_priority = min(priorities) if priorities else 0
-max_priority = max(priorities) if priorities else 1
-priority_range = max_priority - min_priority if max_priority != min_priority else 1
-
-# visualize target points with priority-based colors
+LETTER_SPACING = 1.2
+targets = [vector(*p) for p in (load_letter_points(letter, BUILD_SCALE, LETTER_SPACING) * SCALE_1_15).tolist()]
+
+# priorities of every target under every strategy, rows in STRATEGY_NAMES order
+target_pos = np.array([xyz(t) for t in targets], dtype=float).reshape(-1, 3)
+PRIORITIES = np.stack([
+    -target_pos[:, 1],                      # bottom_up
+    target_pos[:, 1],                       # top_down
+    target_pos[:, 0],                       # left_right
+    -np.linalg.norm(target_pos, axis=1),    # center_out
+    rng.random(len(target_pos)),            # random (redrawn on each switch)
+])
+
+priorities = PRIORITIES[STRATEGY_IDX[current_strategy]]
+
+# construction state of the targets (SoA, indexed like target_spheres)
+class TargetState:
+    """Per-target arrays: position, built/locked flags, priority and build progress"""
+    __slots__ = ('pos', 'built', 'locked', 'priority', 'progress')
+
+    def __init__(self, pos, priorities):
+        n = len(pos)
+        self.pos = pos
+        self.built = np.zeros(n, dtype=bool)
+        self.locked = np.zeros(n, dtype=bool)
+        self.priority = priorities     # active row of PRIORITIES
+        self.progress = np.zeros(n, dtype=np.uint8)
+
+target_state = TargetState(target_pos, priorities)
+
+# visualize target points with priority-based colors (normalized in one pass)
+min_priority = priorities.min() if priorities.size else 0
+priority_range = np.ptp(priorities) if priorities.size else 0
+norm_priority = (priorities - min_priority) / (priority_range or 1)
+target_colors = np.stack([0.3 + norm_priority*0.5, np.full_like(norm_priority, 0.4),
+                          0.9 - norm_priority*0.4], axis=1).tolist()
 target_spheres = []
 for i, t in enumerate(targets):
-    priority = priorities[i]
-    # Normalize priority for color
-    norm_priority = (priority - min_priority) / priority_range
-    color_gradient = vector(0.3 + norm_priority*0.5, 0.4, 0.9 - norm_priority*0.4)
-    
-    spt = sphere(pos=t, radius=0.35, color=color_gradient, opacity=0.25)
+    spt = sphere(pos=t, radius=0.35, color=vector(*target_colors[i]), opacity=0.25)
     target_spheres.append({
+        "idx": i,
         "pos": t, 
         "sphere": spt, 
-        "built": False, 
-        "builder": None,
-        "locked": False,
-        "priority": priority,
-        "build_progress": 0.0
+        "builder": None
     })
 
+# === Swarm state (SoA) ===
+class SwarmState:
+    """Per-satellite state as parallel arrays; Satellite objects index into them.
+    by_status buckets the indices per status code; every status change goes
+    through set_status so the buckets never go stale"""
+    __slots__ = ('pos', 'vel', 'fuel', 'status', 'by_status', 'free_epoch')
+
+    def __init__(self, n):
+        self.pos = np.zeros((n, 3), dtype=np.float32)
+        self.vel = np.zeros((n, 3), dtype=np.float32)
+        self.fuel = np.full(n, F_TOTAL * FUEL_SCALE, dtype=np.int16)
+        self.status = np.full(n, FREE, dtype=np.int8)
+        self.by_status = [set() for _ in STATUS_NAMES]
+        self.by_status[FREE].update(range(n))
+        self.free_epoch = 0    # bumped whenever a satellite enters or leaves FREE
+
+    def set_status(self, i, new):
+        old = self.status[i]
+        if old != new:
+            self.by_status[old].discard(i)
+            self.by_status[new].add(i)
+            self.status[i] = new
+            if old == FREE or new == FREE:
+                self.free_epoch += 1
+
+    def members(self, status):
+        """Indices with this status, in index order"""
+        return sorted(self.by_status[status])
+
+state = SwarmState(NUM_SATELLITES)
+# initial scatter, drawn for the whole swarm at once
+state.pos[:] = rng.uniform(SPAWN_LOW, SPAWN_HIGH, size=(NUM_SATELLITES, 3))
+state.vel[:] = rng.uniform(-1, 1, size=(NUM_SATELLITES, 3)) * VEL_SPREAD
+
 # === Satellite class ===
 class Satellite:
+    """Thin view of satellite idx: kinematics live in `state`, visuals and links here"""
+    __slots__ = ('idx', 'sphere', 'label', 'role', 'target', 'beacon_pair',
+                 'last_action', 'last_goal_revision')
+
     def __init__(self, idx):
         self.idx = idx
-        self.pos = vector(random.uniform(-40, 40),
-                          random.uniform(-5, 30),
-                          random.uniform(-40, 40))
-        self.vel = vector(random.uniform(-1, 1),
-                          random.uniform(-0.3, 0.3),
-                          random.uniform(-1, 1))
-        self.sphere = sphere(pos=self.pos, radius=0.9, color=COLORS["free"], make_trail=False)
+        self.sphere = sphere(pos=self.pos, radius=0.9, color=STATUS_COLORS[FREE], make_trail=False)
         self.label = label(pos=self.pos + vector(0,1.5,0), text=str(int(F_TOTAL)), 
-                          height=10, color=color.white, box=False)
+                          height=10, color=color.white, box=False) if SHOW_LABELS else None
         self.fuel = F_TOTAL
-        self.status = "free"
+        self.status = FREE
         self.role = None
         self.target = None
         self.beacon_pair = None
         self.last_action = 0
         self.last_goal_revision = 0
 
-    def update_label(self):
-        self.label.pos = self.sphere.pos + vector(0,1.3,0)
-        self.label.text = f"{int(self.fuel)}"
+    # pos/vel come out as fresh vectors; assign to write them back to the arrays
+    @property
+    def pos(self):
+        return vector(*state.pos[self.idx].tolist())
+
+    @pos.setter
+    def pos(self, value):
+        state.pos[self.idx] = xyz(value)
+
+    @property
+    def vel(self):
+        return vector(*state.vel[self.idx].tolist())
+
+    @vel.setter
+    def vel(self, value):
+        state.vel[self.idx] = xyz(value)
+
+    @property
+    def fuel(self):
+        return state.fuel[self.idx] / FUEL_SCALE
+
+    @fuel.setter
+    def fuel(self, value):
+        state.fuel[self.idx] = round(value * FUEL_SCALE)
+
+    @property
+    def status(self):
+        return int(state.status[self.idx])
+
+    @status.setter
+    def status(self, value):
+        state.set_status(self.idx, value)
 
     def move_to(self, tgt_pos):
-        dir = tgt_pos - self.pos
-        if mag(dir) < 0.5:
+        p = state.pos[self.idx]
+        dx, dy, dz = tgt_pos.x - p[0], tgt_pos.y - p[1], tgt_pos.z - p[2]
+        m = math.sqrt(dx*dx + dy*dy + dz*dz)
+        if m < 0.5:
             return
-        self.vel = norm(dir)
-        self.pos += self.vel * SPEED
-        self.sphere.pos = self.pos
-        self.update_label()
-
-    def random_roam(self):
-        self.pos += norm(self.vel) * SPEED
-        self.sphere.pos = self.pos
-        self.update_label()
-
-    def step(self):
-        # stationed satellites don't move (holding position)
-        if self.status == "stationed":
-            self.fuel -= ICE_CONSUMPTION * 0.01
-            self.sphere.pos = self.pos
-            self.update_label()
-            if self.fuel <= 0:
-                self.status = "dead"
-                self.sphere.color = COLORS["dead"]
-            return
-        
-        # beacons: fixed, minimal drain
-        if self.status == "beacon":
-            self.fuel -= ICE_CONSUMPTION * 0.02
-            self.sphere.pos = self.pos
-            self.update_label()
-            if self.fuel <= 0:
-                self.status = "dead"
-                self.sphere.color = COLORS["dead"]
-            return
-
-        if self.status == "builder":
-            if self.beacon_pair:
-                center = (self.beacon_pair[0].pos + self.beacon_pair[1].pos) / 2
-                self.move_to(center)
-        elif self.status == "rescue" and self.target:
-            self.move_to(self.target.pos)
-        elif self.status in ["returning", "weak"]:
-            self.move_to(BASE_POS)
-        elif self.status == "free":
-            self.random_roam()
+        v = state.vel[self.idx]
+        v[:] = (dx/m, dy/m, dz/m)
+        p += v * SPEED
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _integrate(pos, vel, fuel, status, goal, seek, tick):
+    """Movement, boundary reflection and fuel drain; each satellite independent"""
+    for i in prange(pos.shape[0]):
+        st = status[i]
+        # stationed satellites and beacons hold position, minimal drain
+        # (staggered by index so the swarm doesn't tick down in lockstep)
+        if st == STATIONED:
+            if (tick + i) % STATIONED_DRAIN_EVERY == 0:
+                fuel[i] -= 1
+            continue
+        if st == BEACON:
+            if (tick + i) % BEACON_DRAIN_EVERY == 0:
+                fuel[i] -= 1
+            continue
+
+        # seekers steer straight at the goal, free satellites roam along vel
+        if seek[i]:
+            dx = goal[i, 0] - pos[i, 0]
+            dy = goal[i, 1] - pos[i, 1]
+            dz = goal[i, 2] - pos[i, 2]
+            d = math.sqrt(dx*dx + dy*dy + dz*dz)
+            if d >= 0.5:
+                vel[i, 0] = dx / d
+                vel[i, 1] = dy / d
+                vel[i, 2] = dz / d
+                for k in range(3):
+                    pos[i, k] += vel[i, k] * SPEED
+        elif st == FREE:
+            v = math.sqrt(vel[i, 0]**2 + vel[i, 1]**2 + vel[i, 2]**2)
+            if v > 0:
+                for k in range(3):
+                    pos[i, k] += vel[i, k] / v * SPEED
 
         # boundaries
-        for axis in ['x','y','z']:
-            val = getattr(self.pos, axis)
-            if abs(val) > 60:
-                setattr(self.vel, axis, -getattr(self.vel, axis))
-        
-        # fuel consumption
-        if self.status not in ["beacon", "stationed"]:
-            self.fuel -= ICE_CONSUMPTION
-
-        # transitions
-        if self.fuel <= 0 and self.status != "dead":
-            self.status = "dead"
-            self.sphere.color = COLORS["dead"]
-            self.vel = vector(0,0,0)
-            self.label.color = color.red
-        elif self.status == "free" and self.fuel < T_CRITICAL:
-            self.status = "weak"
-            self.sphere.color = COLORS["weak"]
-        
+        for k in range(3):
+            if abs(pos[i, k]) > WORLD_BOUND:
+                vel[i, k] = -vel[i, k]
+
+        fuel[i] = max(fuel[i] - ICE_DRAIN, FUEL_FLOOR)
+
+def step_all(sats, frame):
+    """One physics step for the whole swarm: movement, bounce and fuel drain in
+    the compiled kernel; the rare status transitions are then handled per satellite"""
+    pos, vel, fuel, st = state.pos, state.vel, state.fuel, state.status
+
+    # goals: returning/weak head home, builders to their beacon midpoint,
+    # rescuers to their victim
+    goal = np.empty_like(pos)
+    goal[:] = xyz(BASE_POS)
+    seek = (st == RETURNING) | (st == WEAK)
+    for i in np.flatnonzero((st == BUILDER) | (st == RESCUE)):
+        s = sats[i]
+        if st[i] == BUILDER and s.beacon_pair:
+            c, r = s.beacon_pair
+            goal[i] = (pos[c.idx] + pos[r.idx]) / 2
+            seek[i] = True
+        elif st[i] == RESCUE and s.target:
+            goal[i] = pos[s.target.idx]
+            seek[i] = True
+
+    _integrate(pos, vel, fuel, st, goal, seek, frame)
+    held = (st == BEACON) | (st == STATIONED)
+
+    # transitions
+    for i in np.flatnonzero(((fuel <= 0) & (st != DEAD)) | ((st == FREE) & (fuel < T_CRITICAL * FUEL_SCALE))):
+        s = sats[i]
+        if fuel[i] <= 0:
+            s.status = DEAD
+            if not held[i]:
+                vel[i] = 0
+                if s.label:
+                    s.label.color = color.red
+        else:
+            s.status = WEAK
+
+    # docking at base and rescue hand-offs, in satellite order
+    off = pos - np.asarray(xyz(BASE_POS), dtype=pos.dtype)
+    home = (st == RETURNING) & (np.einsum("ij,ij->i", off, off) < DOCK_RADIUS2)
+    for i in np.flatnonzero(home | (st == RESCUE)):
+        s = sats[i]
         # returning to base logic
-        if self.status == "returning" and mag(self.pos - BASE_POS) < 3:
-            self.fuel = F_TOTAL
-            self.status = "free"
-            self.vel = vector(random.uniform(-1, 1), random.uniform(-0.3, 0.3), random.uniform(-1, 1))
-            self.role = None
-            self.beacon_pair = None
-            self.sphere.color = COLORS["free"]
-        
+        if home[i]:
+            s.fuel = F_TOTAL
+            s.status = FREE
+            state.vel[s.idx] = random_vel()
+            s.role = None
+            s.beacon_pair = None
+
         # improved rescue logic
-        if self.status == "rescue" and self.target and mag(self.pos - self.target.pos) < 3:
-            if self.fuel >= MIN_RESCUE_FUEL:
-                transfer = min(MIN_RESCUE_FUEL, self.fuel // 2, F_TOTAL - self.target.fuel)
+        elif s.target and dist2(s.pos, s.target.pos) < DOCK_RADIUS2:
+            if s.fuel >= MIN_RESCUE_FUEL:
+                transfer = min(MIN_RESCUE_FUEL, s.fuel // 2, F_TOTAL - s.target.fuel)
                 if transfer > 0:
-                    self.fuel -= transfer
-                    self.target.fuel = min(self.target.fuel + transfer, F_TOTAL)
-                    if self.target.fuel > T_CRITICAL:
-                        self.target.status = "free"
-                        self.target.vel = vector(random.uniform(-1,1), random.uniform(-0.3,0.3), random.uniform(-1,1))
-                        self.target.sphere.color = COLORS["free"]
-                    self.status = "returning"
-                    self.target = None
-                    self.sphere.color = COLORS["returning"]
-        
-        # update colors
-        if self.status == "free":
-            self.sphere.color = COLORS["free"]
-        if self.status == "builder":
-            self.sphere.color = COLORS["builder"]
-        if self.status == "returning":
-            self.sphere.color = COLORS["returning"]
-        if self.status == "rescue":
-            self.sphere.color = COLORS["rescue"]
-        
-        self.sphere.pos = self.pos
-        self.update_label()
-
-# === Swarm initialization ===
-satellites = [Satellite(i) for i in range(NUM_SATELLITES)]
+                    s.fuel -= transfer
+                    s.target.fuel = min(s.target.fuel + transfer, F_TOTAL)
+                    if s.target.fuel > T_CRITICAL:
+                        s.target.status = FREE
+                        state.vel[s.target.idx] = random_vel()
+                    s.status = RETURNING
+                    s.target = None
 
 # Improved Alpha AI
 class AlphaAI:
+    __slots__ = ('sat', 'visual', 'visual_xyz', 'links', 'links_shown', 'counter', 'bond_radius', 'triplet_interval_frames',
+                 'last_triplet_frame', 'build_strategy', 'last_strategy_change', '_free_tree')
+
     def __init__(self, satellites):
         self.sat = satellites
         self.visual = sphere(pos=BASE_POS + vector(0, -5, 0), radius=1.0, 
                            color=COLORS["alpha"], emissive=True, opacity=0.6)
-        self.links = []
+        self.visual_xyz = np.array(xyz(self.visual.pos))   # smoothed center, kept off the vpython side
+        # pooled curves to low-fuel satellites, reused every frame instead of recreated
+        self.links = [self.new_link() for _ in range(NUM_SATELLITES)]
+        self.links_shown = 0
         self.counter = 0
         self.bond_radius = BOND_RADIUS
         self.triplet_interval_frames = 120
         self.last_triplet_frame = -999
         self.build_strategy = "bottom_up"
         self.last_strategy_change = 0
+        self._free_tree = None
+
+    def free_tree(self):
+        """k-d tree over free satellites, built lazily; dropped every frame (they
+        move) and whenever the free set changes (SwarmState.free_epoch)"""
+        if self._free_tree is None or self._free_tree[0] != state.free_epoch:
+            free_idx = np.flatnonzero(state.status == FREE)
+            free = [self.sat[i] for i in free_idx]
+            tree = cKDTree(state.pos[free_idx]) if free else None
+            self._free_tree = (state.free_epoch, tree, free)
+        return self._free_tree[1:]
 
     def telemetry(self):
-        total = sum(s.fuel for s in self.sat)
-        avg = total / len(self.sat)
-        free = len([s for s in self.sat if s.status == "free"])
-        builder = len([s for s in self.sat if s.status == "builder"])
-        beacon = len([s for s in self.sat if s.status == "beacon"])
-        stationed = len([s for s in self.sat if s.status == "stationed"])
-        dead = len([s for s in self.sat if s.status == "dead"])
-        weak = len([s for s in self.sat if s.status == "weak"])
+        avg = float(state.fuel.mean()) / FUEL_SCALE
+        counts = np.bincount(state.status, minlength=len(STATUS_NAMES)).tolist()
+        free = counts[FREE]
+        builder = counts[BUILDER]
+        beacon = counts[BEACON]
+        stationed = counts[STATIONED]
+        dead = counts[DEAD]
+        weak = counts[WEAK]
         instability = (weak + dead) / max(1, len(self.sat))
-        completion = sum(1 for t in target_spheres if t["built"]) / max(1, len(target_spheres))
+        completion = int(target_state.built.sum()) / max(1, len(target_spheres))
         return {
             "avg": avg, "free": free, "builder": builder, "beacon": beacon,
             "stationed": stationed, "dead": dead, "weak": weak, 
             "instability": instability, "completion": completion
         }
 
+    def new_link(self):
+        return curve(pos=[vector(0,0,0), vector(0,0,0)], color=COLORS["alpha"],
+                     radius=0.05, opacity=0.3, visible=False)
+
     def visualize_influence(self):
-        for l in self.links:
-            l.visible = False
-        self.links.clear()
-        for s in self.sat:
-            if s.fuel < T_LOW and s.status != "dead":
-                self.links.append(curve(pos=[self.visual.pos, s.pos], 
-                                      color=COLORS["alpha"], radius=0.05, opacity=0.3))
+        k = 0
+        for i in np.flatnonzero((state.fuel < T_LOW * FUEL_SCALE) & (state.status != DEAD)):
+            if k == len(self.links):
+                self.links.append(self.new_link())
+            link = self.links[k]
+            link.modify(0, pos=self.visual.pos)
+            link.modify(1, pos=vector(*state.pos[i].tolist()))
+            link.visible = True
+            k += 1
+        # hide only the curves that were shown last frame
+        for link in self.links[k:self.links_shown]:
+            link.visible = False
+        self.links_shown = k
 
     def regulate(self, frame):
         global current_strategy
         self.counter += 1
+        self._free_tree = None
         tm = self.telemetry()
 
         # move alpha to swarm center
-        center = sum([s.pos for s in self.sat], vector(0,0,0)) / len(self.sat)
-        self.visual.pos = self.visual.pos * 0.95 + center * 0.05
+        self.visual_xyz = self.visual_xyz * 0.95 + state.pos.mean(axis=0) * 0.05
+        self.visual.pos = vector(*self.visual_xyz.tolist())
 
         # Improved strategy switching with longer intervals
         if frame - self.last_strategy_change > STRATEGY_CHANGE_INTERVAL:
@@ -342,22 +449,24 @@ class AlphaAI:
             else:
                 self.build_strategy = "random"
             
-            # recalculate priorities
-            for t in target_spheres:
-                t["priority"] = calculate_priority(t["pos"], self.build_strategy)
+            # switch priorities to the precomputed row
+            k = STRATEGY_IDX[self.build_strategy]
+            if self.build_strategy == "random":
+                PRIORITIES[k] = rng.random(PRIORITIES.shape[1])
+            target_state.priority = PRIORITIES[k]
             current_strategy = self.build_strategy
             self.last_strategy_change = frame
 
         # instability handling
         if tm["instability"] > 0.25:
             self.bond_radius = min(80, self.bond_radius + 2)
-            if tm["builder"] > 0 and random.random() < 0.2:
+            if tm["builder"] > 0 and rng.random() < 0.2:
                 self.force_restructure()
         else:
             self.bond_radius = max(6, self.bond_radius - 0.5)
 
         # rescue dead
-        if tm["dead"] > 0 and random.random() < 0.5:
+        if tm["dead"] > 0 and rng.random() < 0.5:
             self.prioritize_rescue()
 
         # check for stuck builders
@@ -368,11 +477,9 @@ class AlphaAI:
 
         # Reactivate stationed satellites if needed
         if tm["free"] < 5 and tm["stationed"] > 0 and tm["completion"] < 1.0:
-            stationed_sats = [s for s in self.sat if s.status == "stationed"]
-            for s in stationed_sats[:min(3, len(stationed_sats))]:
-                s.status = "free"
-                s.vel = vector(random.uniform(-1,1), random.uniform(-0.3,0.3), random.uniform(-1,1))
-                s.sphere.color = COLORS["free"]
+            for s in [self.sat[i] for i in state.members(STATIONED)[:3]]:
+                s.status = FREE
+                state.vel[s.idx] = random_vel()
                 if frame % 60 == 0:
                     print(f"[Alpha] Reactivated stationed satellite {s.idx}")
 
@@ -389,82 +496,102 @@ class AlphaAI:
                 self.last_triplet_frame = frame
 
     def force_restructure(self):
-        builders = [s for s in self.sat if s.status == "builder"]
+        builders = [self.sat[i] for i in state.members(BUILDER)]
         if not builders:
             return
-        sample = random.sample(builders, min(2, len(builders)))
+        sample = [builders[i] for i in rng.choice(len(builders), min(2, len(builders)), replace=False)]
         for b in sample:
             pair = b.beacon_pair
             if pair:
                 commander, reserver = pair
                 # Free the beacons instead of keeping them as beacons
-                commander.status = "free"
-                reserver.status = "free"
+                commander.status = FREE
+                reserver.status = FREE
                 commander.role = None
                 reserver.role = None
-                commander.vel = vector(random.uniform(-1,1), random.uniform(-0.3,0.3), random.uniform(-1,1))
-                reserver.vel = vector(random.uniform(-1,1), random.uniform(-0.3,0.3), random.uniform(-1,1))
-                commander.sphere.color = COLORS["free"]
-                reserver.sphere.color = COLORS["free"]
-            b.status = "returning"
+                state.vel[commander.idx] = random_vel()
+                state.vel[reserver.idx] = random_vel()
+            b.status = RETURNING
             b.beacon_pair = None
-            b.sphere.color = COLORS["returning"]
 
     def prioritize_rescue(self):
-        dead = [s for s in self.sat if s.status == "dead"]
-        free = [s for s in self.sat if s.status == "free" and s.fuel > T_LOW]
-        for victim in dead[:min(3, len(dead))]:
-            if not free:
+        dead_idx = np.flatnonzero(state.status == DEAD)[:3]
+        free_idx = np.flatnonzero((state.status == FREE) & (state.fuel > T_LOW * FUEL_SCALE))
+        if not dead_idx.size or not free_idx.size:
+            return
+        # (free x victim) squared distances; greedy nearest rescuer per victim
+        d = state.pos[free_idx, None, :] - state.pos[None, dead_idx, :]
+        d2 = np.einsum("fvk,fvk->fv", d, d)
+        for j, v in enumerate(dead_idx):
+            f = np.argmin(d2[:, j])
+            if np.isinf(d2[f, j]):
                 break
-            rescuer = min(free, key=lambda s: mag(s.pos - victim.pos))
-            rescuer.status = "rescue"
-            rescuer.target = victim
-            rescuer.sphere.color = COLORS["rescue"]
-            free.remove(rescuer)
+            d2[f, :] = np.inf          # each rescuer takes one victim
+            rescuer = self.sat[free_idx[f]]
+            rescuer.status = RESCUE
+            rescuer.target = self.sat[v]
 
     def pull_toward_targets(self):
-        unbuilt = [t for t in target_spheres if not t["built"] and not t["locked"]]
-        if not unbuilt:
+        unbuilt = open_targets()
+        if not unbuilt.size:
             return
-        free = [s for s in self.sat if s.status == "free"]
+        free = np.flatnonzero(state.status == FREE).tolist()
         # Sort targets by priority (highest first)
-        unbuilt.sort(key=lambda t: t["priority"], reverse=True)
-        random.shuffle(free)
-        for s in free[:min(len(free), len(unbuilt))]:
-            # Assign to highest priority targets first
-            target = unbuilt.pop(0)
-            dir = norm(target["pos"] - s.pos)
-            s.vel = s.vel * 0.6 + dir * 0.4
-            if not unbuilt:
-                break
+        unbuilt = unbuilt[np.argsort(-target_state.priority[unbuilt], kind="stable")]
+        rng.shuffle(free)
+        n = min(len(free), len(unbuilt))
+        if not n:
+            return
+        # Assign to highest priority targets first
+        sel = np.array(free[:n])
+        dir = target_state.pos[unbuilt[:n]] - state.pos[sel]
+        length = np.linalg.norm(dir, axis=1, keepdims=True)
+        np.divide(dir, length, out=dir, where=length > 0)
+        state.vel[sel] = state.vel[sel] * 0.6 + dir * 0.4
 
 # === Improved triplet formation ===
 def form_triplet(bond_radius=BOND_RADIUS):
-    free = [s for s in satellites if s.status == "free" and s.fuel >= T_LOW]
+    free = [satellites[i] for i in state.members(FREE) if state.fuel[i] >= T_LOW * FUEL_SCALE]
     if len(free) < 3:
         return None
     
+    tree, tree_sats = alpha.free_tree()
+    eligible = set(free)
+
+    def candidates(center, radius):
+        """Eligible satellites possibly within radius of center"""
+        if tree is None:
+            return [s for s in satellites if s in eligible]
+        return [tree_sats[i] for i in sorted(tree.query_ball_point(xyz(center), radius + TREE_SLACK))
+                if tree_sats[i] in eligible]
+    
     # Try to form triplets near unbuilt targets
-    unbuilt_targets = [t for t in target_spheres if not t["built"]]
+    unbuilt_targets = np.flatnonzero(~target_state.built).tolist()
     if unbuilt_targets:
         # Pick a random unbuilt target area
-        target_area = random.choice(unbuilt_targets)["pos"]
+        target_area = target_spheres[unbuilt_targets[rng.integers(len(unbuilt_targets))]]["pos"]
         # Find satellites near target area
-        near_target = [s for s in free if mag(s.pos - target_area) < bond_radius * 2]
+        near_r2 = (bond_radius * 2) ** 2
+        near_target = [s for s in candidates(target_area, bond_radius * 2)
+                       if dist2(s.pos, target_area) < near_r2]
         if len(near_target) >= 3:
             free = near_target
+            eligible = set(free)
     
-    s1 = random.choice(free)
-    neighbors = [s for s in free if s is not s1 and mag(s.pos - s1.pos) <= bond_radius]
+    s1 = free[rng.integers(len(free))]
+    bond_r2 = bond_radius * bond_radius
+    neighbors = [s for s in candidates(s1.pos, bond_radius)
+                 if s is not s1 and dist2(s.pos, s1.pos) <= bond_r2]
     if len(neighbors) < 2:
         return None
-    neighbors.sort(key=lambda s: mag(s.pos - s1.pos))
+    neighbors.sort(key=lambda s: dist2(s.pos, s1.pos))
     s2, s3 = neighbors[0], neighbors[1]
     triplet = [s1, s2, s3]
     
-    s1.status = "builder"
-    s2.status = "beacon"
-    s3.status = "beacon"
+    s1.status = BUILDER
+    s1.target = None    # may still point at a rescue victim from an aborted rescue
+    s2.status = BEACON
+    s3.status = BEACON
     
     if s2.fuel < s3.fuel:
         s2.role = "commander"
@@ -480,9 +607,6 @@ def form_triplet(bond_radius=BOND_RADIUS):
     for s in triplet:
         s.fuel -= T_LOW * 0.2
     
-    s1.sphere.color = COLORS["builder"]
-    s2.sphere.color = COLORS[s2.role]
-    s3.sphere.color = COLORS[s3.role]
     return triplet
 
 # === Improved refuel ===
@@ -509,74 +633,120 @@ def refuel_builder(builder):
         return True
     return False
 
+def refuel_weak():
+    """Weak satellites in contact with a reserver that can spare fuel take a share"""
+    weak = np.flatnonzero(state.status == WEAK)
+    reservers = np.array([i for i in np.flatnonzero(state.status == BEACON)
+                          if satellites[i].role == "reserver"], dtype=np.intp)
+    if not reservers.size:
+        return
+    # reservers in contact range for every weak satellite in one query, nearest first
+    dists, nn = cKDTree(state.pos[reservers]).query(
+        state.pos[weak], k=len(reservers), distance_upper_bound=math.sqrt(DOCK_RADIUS2))
+    dists = dists.reshape(len(weak), -1)
+    nn = nn.reshape(len(weak), -1)
+    share = round(F_MAX_SHARE * FUEL_SCALE)
+    # in index order, the nearest reserver that still has fuel to spare donates;
+    # a donor keeps serving while it stays above the threshold
+    for k in np.flatnonzero(np.isfinite(dists[:, 0])).tolist():
+        for j in nn[k][np.isfinite(dists[k])].tolist():
+            d = reservers[j]
+            if state.fuel[d] > F_TOTAL * 0.33 * FUEL_SCALE:
+                transfer = min(share, int(state.fuel[d]) - T_CRITICAL * FUEL_SCALE)
+                w = weak[k]
+                state.fuel[d] -= transfer
+                state.fuel[w] = min(int(state.fuel[w]) + transfer, F_TOTAL * FUEL_SCALE)
+                state.set_status(w, FREE)
+                break
+
 # === Improved collision check ===
 def check_collision_path(s, target_dict):
     """Check if another builder is already targeting this point"""
-    for other in satellites:
-        if (other.status == "builder" and other is not s and 
-            other.target == target_dict):
-            my_dist = mag(s.pos - target_dict["pos"])
-            other_dist = mag(other.pos - target_dict["pos"])
-            if other_dist < my_dist:
+    for i in np.flatnonzero(state.status == BUILDER):
+        other = satellites[i]
+        if other is not s and other.target == target_dict:
+            my_dist2 = dist2(s.pos, target_dict["pos"])
+            other_dist2 = dist2(other.pos, target_dict["pos"])
+            if other_dist2 < my_dist2:
                 return True
     return False
 
+def open_targets():
+    """Indices of the unbuilt, unlocked targets"""
+    return np.flatnonzero(~target_state.built & ~target_state.locked)
+
 # === Improved building logic ===
-def building_step(frame):
+def building_step(frame, opened=None):
+    """opened: open_targets() computed once for this frame"""
     # First, clean up any locked targets that have dead or non-builder owners
-    for t in target_spheres:
-        if t["locked"] and (t["builder"] is None or t["builder"].status != "builder"):
-            t["locked"] = False
+    released = False
+    for k in np.flatnonzero(target_state.locked):
+        t = target_spheres[k]
+        if t["builder"] is None or t["builder"].status != BUILDER:
+            target_state.locked[k] = False
             t["builder"] = None
+            released = True
+    if opened is None or released:
+        opened = open_targets()
+    opened_pos = target_state.pos[opened]
+    opened_prio = target_state.priority[opened]
+    # targets locked by a builder earlier in this frame
+    taken = np.zeros(len(opened), dtype=bool)
     
-    for s in satellites:
-        if s.status == "builder" and s.beacon_pair:
+    for i in state.members(BUILDER):
+        s = satellites[i]
+        if s.status == BUILDER and s.beacon_pair:
             # If builder already has a target and it's still valid, keep it
-            if (s.target is not None and not s.target["built"] and 
-                s.target["builder"] is s and s.target["locked"] and
+            if (s.target is not None and not target_state.built[s.target["idx"]] and 
+                s.target["builder"] is s and target_state.locked[s.target["idx"]] and
                 frame - s.last_goal_revision < GOAL_REVISION_INTERVAL):
                 # Keep current target
                 target_dict = s.target
             else:
                 # Find new target
-                unbuilt = [t for t in target_spheres 
-                          if not t["built"] and not t["locked"]]
+                unbuilt = np.flatnonzero(~taken)
                 
-                if not unbuilt:
+                if not unbuilt.size:
                     # No targets left, return to base
-                    s.status = "returning"
+                    s.status = RETURNING
                     # Free the beacons
                     if s.beacon_pair:
                         for beacon in s.beacon_pair:
-                            beacon.status = "free"
+                            beacon.status = FREE
                             beacon.role = None
-                            beacon.vel = vector(random.uniform(-1,1), random.uniform(-0.3,0.3), random.uniform(-1,1))
-                            beacon.sphere.color = COLORS["free"]
+                            state.vel[beacon.idx] = random_vel()
                     s.beacon_pair = None
                     s.target = None
                     continue
                 
                 # Improved scoring with configurable weights
-                def score(t):
-                    dist = mag(t["pos"] - s.pos)
-                    return t["priority"] * PRIORITY_WEIGHT - dist * DISTANCE_WEIGHT
+                d = opened_pos[unbuilt] - xyz(s.pos)
+                dist = np.sqrt(d[:, 0]*d[:, 0] + d[:, 1]*d[:, 1] + d[:, 2]*d[:, 2])
+                score = opened_prio[unbuilt] * PRIORITY_WEIGHT - dist * DISTANCE_WEIGHT
                 
-                # Sort by score (higher is better)
-                unbuilt.sort(key=score, reverse=True)
+                # Only the top few can win; select them in O(T), then order them
+                # (higher score first, ties keep target order)
+                if unbuilt.size > TARGET_CANDIDATES:
+                    top = np.argpartition(-score, TARGET_CANDIDATES - 1)[:TARGET_CANDIDATES]
+                else:
+                    top = np.arange(unbuilt.size)
+                ranked = unbuilt[top[np.lexsort((top, -score[top]))]]
                 
                 # Find the best available target
-                target_dict = None
-                for candidate in unbuilt:
-                    if not check_collision_path(s, candidate):
-                        target_dict = candidate
+                best = None
+                for k in ranked:
+                    if not check_collision_path(s, target_spheres[opened[k]]):
+                        best = k
                         break
                 
-                if target_dict is None:
-                    # All good targets are taken, try next best
-                    target_dict = unbuilt[0]
+                if best is None:
+                    # All good targets are taken, take the best one anyway
+                    best = ranked[0]
                 
                 # Lock the target
-                target_dict["locked"] = True
+                taken[best] = True
+                target_dict = target_spheres[opened[best]]
+                target_state.locked[opened[best]] = True
                 target_dict["builder"] = s
                 s.target = target_dict
                 s.last_goal_revision = frame
@@ -585,15 +755,15 @@ def building_step(frame):
             s.move_to(target_dict["pos"])
             
             # Gradual construction animation
-            dist = mag(s.pos - target_dict["pos"])
-            if dist < ARRIVAL_RADIUS:
-                target_dict["build_progress"] += 0.05
-                target_dict["sphere"].opacity = 0.25 + target_dict["build_progress"] * 0.65
+            if dist2(s.pos, target_dict["pos"]) < ARRIVAL_RADIUS2:
+                k = target_dict["idx"]
+                target_state.progress[k] = min(int(target_state.progress[k]) + PROGRESS_STEP, PROGRESS_FULL)
+                target_dict["sphere"].opacity = 0.25 + target_state.progress[k] / PROGRESS_FULL * 0.65
                 
-                if target_dict["build_progress"] >= 1.0:
+                if target_state.progress[k] >= PROGRESS_FULL:
                     # Construction complete
-                    target_dict["built"] = True
-                    target_dict["locked"] = False
+                    target_state.built[k] = True
+                    target_state.locked[k] = False
                     target_dict["builder"] = None
                     target_dict["sphere"].color = color.white
                     target_dict["sphere"].opacity = 0.95
@@ -601,90 +771,122 @@ def building_step(frame):
                     s.target = None
                     
                     # Station builder or continue building
-                    if random.random() < STATIONED_CHANCE:
-                        s.status = "stationed"
+                    if rng.random() < STATIONED_CHANCE:
+                        s.status = STATIONED
                         s.pos = target_dict["pos"]
                         s.vel = vector(0,0,0)
-                        s.sphere.color = COLORS["stationed"]
                         # Free the beacons
                         if s.beacon_pair:
                             for beacon in s.beacon_pair:
-                                beacon.status = "free"
+                                beacon.status = FREE
                                 beacon.role = None
-                                beacon.vel = vector(random.uniform(-1,1), random.uniform(-0.3,0.3), random.uniform(-1,1))
-                                beacon.sphere.color = COLORS["free"]
+                                state.vel[beacon.idx] = random_vel()
                             s.beacon_pair = None
                     
                     # Refuel check
-                    if s.fuel < T_LOW and s.status != "stationed":
+                    if s.fuel < T_LOW and s.status != STATIONED:
                         if not refuel_builder(s):
-                            s.status = "returning"
+                            s.status = RETURNING
                             # Free the beacons
                             if s.beacon_pair:
                                 for beacon in s.beacon_pair:
-                                    beacon.status = "free"
+                                    beacon.status = FREE
                                     beacon.role = None
-                                    beacon.vel = vector(random.uniform(-1,1), random.uniform(-0.3,0.3), random.uniform(-1,1))
-                                    beacon.sphere.color = COLORS["free"]
+                                    state.vel[beacon.idx] = random_vel()
                                 s.beacon_pair = None
 
+# === Rendering ===
+def render(sats):
+    """Flush the frame's state to vpython once, writing only what changed"""
+    # position: beacons/stationed never move, so they never cross the bridge
+    moved = state.pos - drawn_pos
+    for i in np.flatnonzero(np.einsum("ij,ij->i", moved, moved) >= MIN_RENDER_MOVE2):
+        p = vector(*state.pos[i].tolist())
+        sats[i].sphere.pos = p
+        if SHOW_LABELS:
+            sats[i].label.pos = p + vector(0,1.3,0)
+        drawn_pos[i] = state.pos[i]
+    # fuel text only when the whole-unit value shown actually changes
+    if SHOW_LABELS:
+        shown = (state.fuel / FUEL_SCALE).astype(np.int32)
+        for i in np.flatnonzero(shown != drawn_fuel):
+            sats[i].label.text = str(shown[i])
+        drawn_fuel[:] = shown
+    # status colors only on transition; beacons show their role
+    for i in np.flatnonzero(state.status != drawn_status):
+        s = sats[i]
+        if state.status[i] == BEACON and s.role:
+            s.sphere.color = COLORS[s.role]
+        else:
+            s.sphere.color = STATUS_COLORS[state.status[i]]
+    drawn_status[:] = state.status
+
 # === INIT ===
 satellites = [Satellite(i) for i in range(NUM_SATELLITES)]
 alpha = AlphaAI(satellites)
+# what vpython currently shows, so render() can skip unchanged writes
+drawn_pos = state.pos.copy()
+drawn_status = state.status.copy()
+drawn_fuel = np.full(NUM_SATELLITES, int(F_TOTAL), dtype=np.int32)
 
 form_triplet(BOND_RADIUS)
 
 # stats label
-stats_label = label(pos=vector(0, -40, 0), text="", height=12, color=color.white, box=False)
-
-# main loop
-frame = 0
-completion_announced = False
-
-print(f"Starting construction of letter '{letter}'...")
-print(f"Total target points: {len(target_spheres)}")
-
-while True:
-    rate(60)
-    frame += 1
+stats_label = label(pos=vector(0, -35, 0), text="", height=12, color=color.white, box=False)
+last_stats_key = None          # displayed fields of the last stats text
 
+def sim_step(frame):
+    """One fixed physics/AI step"""
+    global completion_announced
     alpha.regulate(frame)
 
-    for s in satellites:
-        s.step()
+    step_all(satellites, frame)
 
-    building_step(frame)
+    building_step(frame, open_targets())
 
     # periodic triplet formation
     if frame % 240 == 0:
         form_triplet(alpha.bond_radius)
 
-    # stats update
-    tm = alpha.telemetry()
-    stats_label.text = f"Progress: {tm['completion']*100:.1f}% | Strategy: {alpha.build_strategy} | Builders: {tm['builder']} | Free: {tm['free']} | Stationed: {tm['stationed']} | Dead: {tm['dead']}"
-    stats_label.pos = vector(0, -35, 0)
-
     # completion check
-    if tm["completion"] >= 1.0 and not completion_announced:
+    if not completion_announced and target_state.built.all():
         msg = f"🎉 Construction of '{letter}' completed! 🎉"
         print(msg)
-        print(f"Total frames: {frame} (~{frame/60:.1f} seconds)")
-        completion_y = max(t["pos"].y for t in target_spheres) + 8 if target_spheres else 20
+        print(f"Total frames: {frame} (~{frame*PHYS_DT:.1f} seconds)")
+        completion_y = target_state.pos[:, 1].max() + 8 if target_spheres else 20
         txt = label(pos=vector(0, completion_y, 0),
                    text=msg, height=20, color=color.green, box=True, opacity=0.8)
         completion_announced = True
 
     # Handle weak satellites seeking help from reservers
-    weak = [s for s in satellites if s.status == "weak"]
-    for w in weak:
-        reservers = [s for s in satellites 
-                    if s.status == "beacon" and s.role == "reserver" and s.fuel > F_TOTAL * 0.33]
-        if reservers:
-            nearest = min(reservers, key=lambda r: mag(r.pos - w.pos))
-            if mag(w.pos - nearest.pos) < 3:
-                transfer = min(F_MAX_SHARE, nearest.fuel - T_CRITICAL)
-                if transfer > 0:
-                    nearest.fuel -= transfer
-                    w.fuel = min(w.fuel + transfer, F_TOTAL)
-                    w.status = "free"
-                    w.sphere.color = COLORS["free"]
\ No newline at end of file
+    if np.any(state.status == WEAK):
+        refuel_weak()
+
+# main loop
+frame = 0
+completion_announced = False
+
+print(f"Starting construction of letter '{letter}'...")
+print(f"Total target points: {len(target_spheres)}")
+
+# fixed-step physics, rendering as often as vpython allows
+acc = 0.0
+last = time.perf_counter()
+while True:
+    rate(60)
+    now = time.perf_counter()
+    acc = min(acc + now - last, MAX_PHYS_STEPS * PHYS_DT)
+    last = now
+    while acc >= PHYS_DT:
+        frame += 1
+        sim_step(frame)
+        acc -= PHYS_DT
+
+    render(satellites)
+
+    # stats update, only when a displayed field changed
+    tm = alpha.telemetry()
+    key = (round(tm['completion'], 3), alpha.build_strategy, tm['builder'], tm['free'], tm['stationed'], tm['dead'])
+    if key != last_stats_key:
+        stats_label.text = f"Progress: {tm['completion']*100:.1f}% | Strategy: {alpha.build_strategy} | Builders: {tm['builder']} | Free: {tm['free']} | Stationed: {tm['stationed']} | Dead: {tm['dead']}"
+        last_stats_key = key
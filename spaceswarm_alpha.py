@@ -3,6 +3,16 @@ import pygame
 import random
 import math
 import time
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # without numba the swarm kernels run as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+    prange = range
 
 # === Параметры сцены ===
 WIDTH, HEIGHT = 800, 600
@@ -15,8 +25,34 @@ T_LOW = 30              # Порог низкого топлива (для уч
 T_CRITICAL = 15         # Критический порог (weak)
 F_MAX_SHARE = F_TOTAL / 3  # Макс. передача топлива
 ICE_CONSUMPTION = 0.1
+FUEL_SCALE = 100           # fuel хранится в int16 с фиксированной точкой: 1 = 0.01
+ICE_DRAIN = round(ICE_CONSUMPTION * FUEL_SCALE)
+FUEL_FLOOR = -F_TOTAL * FUEL_SCALE  # dead satellites keep draining; stop well clear of int16 wrap
+# the same thresholds in fuel units: integers, compared directly against Swarm.fuel
+FUEL_FULL = F_TOTAL * FUEL_SCALE
+FUEL_LOW = T_LOW * FUEL_SCALE
+FUEL_CRITICAL = T_CRITICAL * FUEL_SCALE
+FUEL_RESERVE_MIN = round(F_TOTAL * 0.33 * FUEL_SCALE)  # reserver may donate above this
+FUEL_MAX_SHARE = round(F_MAX_SHARE * FUEL_SCALE)
+FUEL_RESCUE_SHARE = 20 * FUEL_SCALE                    # max a rescuer hands over
+TRIPLET_COST = round(T_LOW * 0.2 * FUEL_SCALE)
+RESTRUCTURE_COST = 5 * FUEL_SCALE
 SPEED = 1
 
+# === Пространственная сетка и сортировка ===
+GRID_CELL = 50               # px per spatial-hash cell, also the z-order cell
+REORDER_EVERY = 64           # frames between reorders
+
+# === Коды статусов и ролей (int8 в массивах роя) ===
+FREE, BUILDER, BEACON, RETURNING, RESCUE, WEAK, DEAD = range(7)
+STATUS_NAMES = ("free", "builder", "beacon", "returning", "rescue", "weak", "dead")
+NO_ROLE, COMMANDER, RESERVER = range(3)
+ROLE_NAMES = (None, "commander", "reserver")
+NONE = -1                 # empty target / beacon_pair slot
+# fuel drain per tick by status code: beacons are stationary and burn nothing
+STATUS_DRAIN = np.full(len(STATUS_NAMES), ICE_DRAIN, np.int16)
+STATUS_DRAIN[BEACON] = 0
+
 # === Цвета ===
 WHITE = (255, 255, 255)
 GREY = (100, 100, 100)
@@ -26,6 +62,8 @@ RED = (255, 0, 0)
 YELLOW = (255, 255, 0)
 CYAN = (0, 255, 255)
 DARK = (30, 30, 30)
+STATUS_COLORS = (WHITE, BLUE, DARK, GREEN, YELLOW, GREY, RED)  # beacons: ROLE_COLORS
+ROLE_COLORS = ((0, 180, 180), CYAN, (0, 200, 200))
 
 pygame.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -33,6 +71,23 @@ pygame.display.set_caption("Swarm + Alpha AI")
 clock = pygame.time.Clock()
 font = pygame.font.SysFont(None, 18)
 
+# rendered fuel numbers, one surface per integer value shown
+_FUEL_TEXT_CACHE = {}
+
+def fuel_surface(v):
+    surf = _FUEL_TEXT_CACHE.get(v)
+    if surf is None:
+        surf = _FUEL_TEXT_CACHE[v] = font.render(str(v), True, WHITE)
+    return surf
+
+# one pre-drawn circle per satellite color, blitted instead of draw.circle
+def _circle_sprite(color):
+    surf = pygame.Surface((2 * SAT_RADIUS + 1, 2 * SAT_RADIUS + 1), pygame.SRCALPHA)
+    pygame.draw.circle(surf, color, (SAT_RADIUS, SAT_RADIUS), SAT_RADIUS)
+    return surf
+
+CIRCLE_SPRITES = {c: _circle_sprite(c) for c in STATUS_COLORS + ROLE_COLORS}
+
 # === Глобальные параметры формирования (Alpha может менять) ===
 BOND_RADIUS = 200            # радиус поиска ближайших для формирования триплета
 TRIPLET_INTERVAL = 2000      # минимальный интервал (ms) между попытками формирования триплетов
@@ -48,7 +103,14 @@ class EventBus:
         self._hooks[name].append(fn)
 
     def emit(self, name, *args, **kwargs):
-        for fn in self._hooks.get(name, []):
+        hooks = self._hooks.get(name)
+        if not hooks:
+            return
+        # fast path: a lone subscriber is called directly (its errors propagate)
+        if len(hooks) == 1:
+            hooks[0](*args, **kwargs)
+            return
+        for fn in hooks:
             try:
                 fn(*args, **kwargs)
             except Exception:
@@ -56,200 +118,411 @@ class EventBus:
 
 event_bus = EventBus()
 
-# === Класс спутника ===
-class Satellite:
-    def __init__(self):
-        self.x = random.uniform(0, WIDTH)
-        self.y = random.uniform(0, HEIGHT)
-        self.dx = random.uniform(-1, 1)
-        self.dy = random.uniform(-1, 1)
-        self.fuel = F_TOTAL
-        self.status = "free"      # free, builder, beacon, returning, rescue, weak, dead
-        self.role = None          # commander / reserver / None
-        self.target = None        # target satellite (for rescue) или None
-        self.beacon_pair = None   # [commander, reserver] for builder
-        self.last_triplet_at = 0  # timestamp
-
-    def move(self):
-        # Beacon фиксирован: не двигается (role==commander/reserver => status='beacon')
-        if self.status == "beacon":
-            return
-
-        # Builder moves toward center between its beacons
-        if self.status == "builder" and self.beacon_pair:
-            commander, reserver = self.beacon_pair
-            tx = (commander.x + reserver.x) / 2
-            ty = (commander.y + reserver.y) / 2
-            self.move_to(tx, ty)
-        elif self.status == "rescue" and self.target:
-            # move towards target
-            self.move_to(self.target.x, self.target.y)
-        elif self.status in ["returning", "weak"]:
-            # go to base (center)
-            self.move_to(WIDTH / 2, HEIGHT / 2)
-        else:
-            # free or other: roam
-            self.x += self.dx * SPEED
-            self.y += self.dy * SPEED
-
-        # bound
-        if self.x < 0 or self.x > WIDTH:
-            self.dx *= -1
-            self.x = max(0, min(self.x, WIDTH))
-        if self.y < 0 or self.y > HEIGHT:
-            self.dy *= -1
-            self.y = max(0, min(self.y, HEIGHT))
-
-        # fuel consumption
-        if self.status != "beacon":  # beacon is stationary and doesn't consume (or consumes very little)
-            self.fuel -= ICE_CONSUMPTION
-        else:
-            # small passive drain for beacons
-            self.fuel -= ICE_CONSUMPTION * 0.02
-
-        # transitions
-        if self.fuel <= 0 and self.status != "dead":
-            self.status = "dead"
-            self.dx = self.dy = 0
-        elif self.status == "free" and self.fuel < T_CRITICAL:
-            self.status = "weak"
-
-    def move_to(self, tx, ty):
-        dx = tx - self.x
-        dy = ty - self.y
-        dist = math.hypot(dx, dy)
-        if dist == 0:
-            return
-        self.dx = dx / dist
-        self.dy = dy / dist
+# === Рой (Structure of Arrays) ===
+# one record per satellite: all of its state sits together in memory
+SAT_DTYPE = np.dtype([
+    ("x", "f4"), ("y", "f4"), ("dx", "f4"), ("dy", "f4"),
+    ("fuel", "i2"),            # fixed point, see FUEL_SCALE
+    ("status", "i1"),          # free, builder, beacon, returning, rescue, weak, dead
+    ("role", "i1"),            # commander / reserver / none
+    ("target", "i4"),          # target satellite (for rescue) или NONE
+    ("beacon_pair", "i4", (2,)),  # [commander, reserver] for builder
+    ("last_triplet_at", "i4"),    # timestamp, ms
+    ("goal_x", "f4"), ("goal_y", "f4"),  # goal the current heading was aimed at (move_to)
+])
+
+class Swarm:
+    """All satellites as one record array; the per-field attributes are views
+    into it, and a satellite is just its index"""
+    def __init__(self, n):
+        self.n = n
+        self.rec = np.zeros(n, SAT_DTYPE)
+        for name in SAT_DTYPE.names:
+            setattr(self, name, self.rec[name])
+        for i in range(n):
+            self.x[i] = random.uniform(0, WIDTH)
+            self.y[i] = random.uniform(0, HEIGHT)
+            self.dx[i] = random.uniform(-1, 1)
+            self.dy[i] = random.uniform(-1, 1)
+        self.fuel[:] = FUEL_FULL
+        self.status[:] = FREE
+        self.role[:] = NO_ROLE
+        self.target[:] = NONE
+        self.beacon_pair[:] = NONE
+        self.goal_x[:] = np.nan
+        self.goal_y[:] = np.nan
+        self._members = {}    # status code -> indices; dropped on any status change
+
+    def set_status(self, i, new):
+        """Every status write outside the kernels goes through here (i may be an index array)"""
+        self.status[i] = new
+        self._members.clear()
+        self.goal_x[i] = np.nan    # new status, new goal: re-aim on the next move_to
+
+    def members(self, code):
+        """Indices with this status, cached until the next transition"""
+        idx = self._members.get(code)
+        if idx is None:
+            idx = self._members[code] = np.flatnonzero(self.status == code)
+        return idx
+
+    def step(self):
+        """Move every satellite one tick, then apply the fuel transitions"""
+        _move_and_fuel(self.x, self.y, self.dx, self.dy, self.fuel, self.status,
+                       self.beacon_pair, self.target)
+        if _transitions(self.dx, self.dy, self.fuel, self.status):
+            self._members.clear()
+
+    def reorder(self):
+        """Sort satellites along a Morton (z-order) curve so that index order
+        follows position; target / beacon_pair are remapped to the new indices"""
+        order = np.argsort(_morton(self.x, self.y), kind="stable")
+        self.rec[:] = self.rec[order]    # field views see the moved records
+        new_index = np.empty_like(order)
+        new_index[order] = np.arange(self.n)
+        for ref in (self.target, self.beacon_pair):
+            linked = ref != NONE
+            ref[linked] = new_index[ref[linked]]
+        self._members.clear()
+
+    def move_to(self, i, tx, ty):
+        dx = tx - self.x[i]
+        dy = ty - self.y[i]
+        # same goal as last time (within 1 px) and still more than a step ahead:
+        # the heading is still right, skip the sqrt
+        same_goal = abs(tx - self.goal_x[i]) <= 1 and abs(ty - self.goal_y[i]) <= 1
+        if not (same_goal and dx * self.dx[i] + dy * self.dy[i] > SPEED):
+            dist = math.hypot(dx, dy)
+            if dist == 0:
+                return
+            self.dx[i] = dx / dist
+            self.dy[i] = dy / dist
+            self.goal_x[i] = tx
+            self.goal_y[i] = ty
         # step
-        self.x += self.dx * SPEED
-        self.y += self.dy * SPEED
+        self.x[i] += self.dx[i] * SPEED
+        self.y[i] += self.dy[i] * SPEED
+
+    def color(self, i):
+        st = self.status[i]
+        if st == BEACON:
+            return ROLE_COLORS[self.role[i]]
+        return STATUS_COLORS[st]
 
     def draw(self):
-        # choose color
-        if self.status == "free":
-            color = WHITE
-        elif self.status == "builder":
-            color = BLUE
-        elif self.status == "returning":
-            color = GREEN
-        elif self.status == "dead":
-            color = RED
-        elif self.status == "rescue":
-            color = YELLOW
-        elif self.status == "weak":
-            color = GREY
-        elif self.role == "commander":
-            color = CYAN
-        elif self.role == "reserver":
-            color = (0, 200, 200)
-        elif self.status == "beacon":
-            color = (0, 180, 180)
+        """Blit every satellite (sprite + fuel label) in a single screen.blits call"""
+        items = []
+        for i, (x, y, f) in enumerate(zip(self.x.tolist(), self.y.tolist(), self.fuel.tolist())):
+            items.append((CIRCLE_SPRITES[self.color(i)], (int(x) - SAT_RADIUS, int(y) - SAT_RADIUS)))
+            items.append((fuel_surface(int(f / FUEL_SCALE)), (x + SAT_RADIUS + 2, y - SAT_RADIUS - 2)))
+        screen.blits(items, doreturn=False)
+
+@njit(cache=True)
+def _morton(x, y):
+    """Z-order key: bits of the grid cell column and row interleaved, so that the
+    satellites sharing a spatial-hash bucket get neighbouring indices"""
+    keys = np.empty(x.size, np.uint32)
+    for i in range(x.size):
+        cx = np.uint32(max(x[i], 0) // GRID_CELL)
+        cy = np.uint32(max(y[i], 0) // GRID_CELL)
+        key = np.uint32(0)
+        for b in range(16):
+            key |= ((cx >> b) & 1) << (2 * b)
+            key |= ((cy >> b) & 1) << (2 * b + 1)
+        keys[i] = key
+    return keys
+
+# === Шаг роя (компилируется numba, параллельно по спутникам) ===
+@njit(parallel=True, cache=True, fastmath=True)
+def _move_and_fuel(x, y, dx, dy, fuel, status, pair, target):
+    """Steering, wall bounce and fuel drain; each satellite writes only its own slots"""
+    n = x.size
+    # goals first, from this tick's starting positions (the move loop then never
+    # reads another satellite): builders head to the center between their
+    # beacons, rescuers to their target, returning/weak to base
+    tx = np.empty(n, np.float32)
+    ty = np.empty(n, np.float32)
+    seek = np.zeros(n, np.bool_)
+    for i in prange(n):
+        st = status[i]
+        if st == BUILDER and pair[i, 0] != NONE:
+            tx[i] = (x[pair[i, 0]] + x[pair[i, 1]]) / 2
+            ty[i] = (y[pair[i, 0]] + y[pair[i, 1]]) / 2
+            seek[i] = True
+        elif st == RESCUE and target[i] != NONE:
+            tx[i] = x[target[i]]
+            ty[i] = y[target[i]]
+            seek[i] = True
+        elif st == RETURNING or st == WEAK:
+            tx[i] = WIDTH / 2
+            ty[i] = HEIGHT / 2
+            seek[i] = True
+
+    for i in prange(n):
+        st = status[i]
+        # fuel consumption: table lookup instead of a branch on status
+        fuel[i] = max(fuel[i] - STATUS_DRAIN[st], FUEL_FLOOR)
+
+        # Beacon фиксирован: не двигается и не тратит топливо
+        if st == BEACON:
+            continue
+
+        # seekers steer straight at the goal (and stay put once on it), others roam
+        if seek[i]:
+            gx = tx[i] - x[i]
+            gy = ty[i] - y[i]
+            dist = math.sqrt(gx*gx + gy*gy)
+            if dist != 0:
+                dx[i] = gx / dist
+                dy[i] = gy / dist
+                x[i] += dx[i] * SPEED
+                y[i] += dy[i] * SPEED
         else:
-            color = DARK
+            x[i] += dx[i] * SPEED
+            y[i] += dy[i] * SPEED
 
-        pygame.draw.circle(screen, color, (int(self.x), int(self.y)), SAT_RADIUS)
-        fuel_text = font.render(f"{int(self.fuel)}", True, WHITE)
-        screen.blit(fuel_text, (self.x + SAT_RADIUS + 2, self.y - SAT_RADIUS - 2))
+        # bound
+        if x[i] < 0 or x[i] > WIDTH:
+            dx[i] = -dx[i]
+            x[i] = max(0, min(x[i], WIDTH))
+        if y[i] < 0 or y[i] > HEIGHT:
+            dy[i] = -dy[i]
+            y[i] = max(0, min(y[i], HEIGHT))
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _transitions(dx, dy, fuel, status):
+    """Out of fuel -> dead, free and low -> weak (beacons are exempt); returns
+    how many satellites changed status"""
+    changed = 0
+    for i in prange(status.size):
+        st = status[i]
+        if st == BEACON:
+            continue
+        if fuel[i] <= 0 and st != DEAD:
+            status[i] = DEAD
+            dx[i] = 0
+            dy[i] = 0
+            changed += 1
+        elif st == FREE and fuel[i] < FUEL_CRITICAL:
+            status[i] = WEAK
+            changed += 1
+    return changed
+
+# === Пространственная хеш-сетка ===
+class SpatialHash:
+    """Uniform grid over the live satellites (by index) for radius queries.
+    Kept up to date incrementally: update() only moves the satellites whose
+    cell changed since the last call"""
+    def __init__(self, cell, n):
+        self.cell = cell
+        self.buckets = {}
+        self.cell_x = np.zeros(n, np.int32)
+        self.cell_y = np.zeros(n, np.int32)
+        self.placed = np.zeros(n, np.bool_)   # in a bucket right now
+
+    def update(self, xs, ys, live):
+        """Re-bucket the satellites that crossed a cell boundary; ones no longer
+        live are removed once (and come back only if they become live again)"""
+        self.xs, self.ys = xs, ys
+        cx = (xs // self.cell).astype(np.int32)
+        cy = (ys // self.cell).astype(np.int32)
+        moved = live & ((cx != self.cell_x) | (cy != self.cell_y))
+        for i in np.flatnonzero(moved | (live != self.placed)).tolist():
+            if self.placed[i]:
+                key = (int(self.cell_x[i]), int(self.cell_y[i]))
+                bucket = self.buckets[key]
+                bucket.remove(i)
+                if not bucket:
+                    del self.buckets[key]
+            if live[i]:
+                self.buckets.setdefault((int(cx[i]), int(cy[i])), []).append(i)
+        self.cell_x[moved], self.cell_y[moved] = cx[moved], cy[moved]
+        newly = live & ~self.placed
+        self.cell_x[newly], self.cell_y[newly] = cx[newly], cy[newly]
+        self.placed[:] = live
+        return self
+
+    def clear(self):
+        """Forget every bucket (indices changed); the next update re-inserts all"""
+        self.buckets = {}
+        self.placed[:] = False
+
+    def _scan(self, cells, x, y, found):
+        xs, ys = self.xs, self.ys
+        for key in cells:
+            for i in self.buckets.get(key, ()):
+                ex, ey = float(xs[i]) - x, float(ys[i]) - y
+                found.append((ex*ex + ey*ey, i))
+
+    def query(self, x, y, r):
+        """Indices within r of (x, y), nearest first (ties by index)"""
+        c = self.cell
+        found = []
+        self._scan([(gx, gy) for gx in range(int((x - r) // c), int((x + r) // c) + 1)
+                             for gy in range(int((y - r) // c), int((y + r) // c) + 1)], x, y, found)
+        r2 = r * r
+        return [i for d2, i in sorted(found) if d2 <= r2]
 
 # === Swarm + operations ===
-satellites = [Satellite() for _ in range(NUM_SATELLITES)]
+swarm = Swarm(NUM_SATELLITES)
 last_triplet_try = 0
+# neighbour grid for the radius scans; filtered by status at query time
+grid = SpatialHash(GRID_CELL, NUM_SATELLITES)
+
+def sync_grid():
+    """Bring the grid up to date with the current positions (dead ones drop out)"""
+    return grid.update(swarm.x, swarm.y, swarm.status != DEAD)
 
 def find_dead():
-    return [s for s in satellites if s.status == "dead"]
+    return swarm.members(DEAD)
 
 def find_free():
-    return [s for s in satellites if s.status == "free" and s.fuel >= T_LOW]
+    free = swarm.members(FREE)
+    return free[swarm.fuel[free] >= FUEL_LOW]
 
 def find_beacons():
-    return [s for s in satellites if s.status == "beacon" and s.role in ("commander","reserver")]
+    beacons = swarm.members(BEACON)
+    return beacons[swarm.role[beacons] != NO_ROLE]
 
 def find_weak():
-    return [s for s in satellites if s.status == "weak"]
-
-def distance(a, b):
-    return math.hypot(a.x - b.x, a.y - b.y)
-
-def form_triplet(bond_radius=BOND_RADIUS):
+    return swarm.members(WEAK)
+
+def find_unclaimed_dead():
+    """Dead satellites that no rescuer is heading for yet. A rescuer that could no
+    longer hand over a full share does not hold a claim."""
+    dead = swarm.members(DEAD)
+    rescuers = swarm.members(RESCUE)
+    rescuers = rescuers[swarm.fuel[rescuers] >= FUEL_RESCUE_SHARE]
+    return dead[~np.isin(dead, swarm.target[rescuers])]
+
+def assign_rescuers(rescuers, victims):
+    """Greedy, in victim order: each victim claims the nearest rescuer not yet taken.
+    Rescuers that could not hand over a full share are skipped."""
+    rescuers = rescuers[swarm.fuel[rescuers] >= FUEL_RESCUE_SHARE]
+    d2 = cross_dist2(rescuers, victims)
+    taken = np.zeros(len(rescuers), bool)
+    for k, victim in enumerate(victims[:len(rescuers)]):
+        j = np.where(taken, np.inf, d2[:, k]).argmin()
+        taken[j] = True
+        swarm.set_status(rescuers[j], RESCUE)
+        swarm.target[rescuers[j]] = victim
+
+def dist2(a, b):
+    """Squared distance between satellites a and b (compare against r*r, no sqrt)"""
+    ex = float(swarm.x[a] - swarm.x[b])
+    ey = float(swarm.y[a] - swarm.y[b])
+    return ex*ex + ey*ey
+
+def cross_dist2(a, b):
+    """Squared distances between index arrays a and b, shape (len(a), len(b))"""
+    ex = swarm.x[a, None].astype(float) - swarm.x[None, b]
+    ey = swarm.y[a, None].astype(float) - swarm.y[None, b]
+    return ex*ex + ey*ey
+
+def dist2_to(i, x, y):
+    """Squared distance from satellite i to point (x, y)"""
+    ex = float(swarm.x[i]) - x
+    ey = float(swarm.y[i]) - y
+    return ex*ex + ey*ey
+
+def form_triplet(now, bond_radius=BOND_RADIUS):
     """
     Попытка сформировать триплет в радиусе bond_radius.
     Alpha контролирует bond_radius и TRIPLET_INTERVAL.
     Возвращает сформированный triplet list или None.
+    now -- pygame ticks of the current frame.
     """
     free = find_free()
     if len(free) < 3:
         return None
 
     # pick random seed and find 2 nearest within radius
-    s1 = random.choice(free)
-    neighbors = [s for s in free if s is not s1 and distance(s1, s) <= bond_radius]
+    s1 = random.choice(free.tolist())
+    is_free = np.zeros(swarm.n, np.bool_)
+    is_free[free] = True
+    neighbors = [s for s in sync_grid().query(float(swarm.x[s1]), float(swarm.y[s1]), bond_radius)
+                 if is_free[s] and s != s1]
     if len(neighbors) < 2:
         return None
-    neighbors.sort(key=lambda s: distance(s1, s))
     s2, s3 = neighbors[0], neighbors[1]
     triplet = [s1, s2, s3]
 
     # roles: builder is s1, others become beacons (stationary)
-    s1.status = "builder"
-    s2.status = "beacon"
-    s3.status = "beacon"
+    swarm.set_status(s1, BUILDER)
+    swarm.set_status(s2, BEACON)
+    swarm.set_status(s3, BEACON)
 
     # assign commander/reserver by fuel levels
-    if s2.fuel < s3.fuel:
-        s2.role = "commander"
-        s3.role = "reserver"
+    if swarm.fuel[s2] < swarm.fuel[s3]:
+        swarm.role[s2] = COMMANDER
+        swarm.role[s3] = RESERVER
     else:
-        s2.role = "reserver"
-        s3.role = "commander"
+        swarm.role[s2] = RESERVER
+        swarm.role[s3] = COMMANDER
 
     # fix beacon velocities (stay)
-    s2.dx = s2.dy = 0
-    s3.dx = s3.dy = 0
+    swarm.dx[[s2, s3]] = 0
+    swarm.dy[[s2, s3]] = 0
 
     # link builder to beacons
-    s1.beacon_pair = [s2, s3]
+    swarm.beacon_pair[s1] = (s2, s3)
 
     # cost for formation
-    for s in triplet:
-        s.fuel -= T_LOW * 0.2
+    swarm.fuel[triplet] -= TRIPLET_COST
 
     # set last_triplet_at
-    ts = pygame.time.get_ticks()
-    for s in triplet:
-        s.last_triplet_at = ts
+    swarm.last_triplet_at[triplet] = now
 
     event_bus.emit("triplet_created", triplet)
     return triplet
 
 def refuel_builder(builder):
     """Попытка резервера передать топливо билдиру."""
-    if not builder.beacon_pair:
+    if swarm.beacon_pair[builder, 0] == NONE:
         return False
-    commander, reserver = builder.beacon_pair
-    if reserver.fuel > F_TOTAL * 0.33:
+    commander, reserver = swarm.beacon_pair[builder]
+    fuel = swarm.fuel
+    if fuel[reserver] > FUEL_RESERVE_MIN:
         # передать
-        fuel_transfer = min(F_MAX_SHARE, reserver.fuel * 0.5)
+        fuel_transfer = min(FUEL_MAX_SHARE, int(fuel[reserver]) // 2)
         # don't starve reserver below threshold
-        fuel_transfer = min(fuel_transfer, reserver.fuel - T_CRITICAL)
+        fuel_transfer = min(fuel_transfer, int(fuel[reserver]) - FUEL_CRITICAL)
         if fuel_transfer <= 0:
             return False
-        reserver.fuel -= fuel_transfer
-        builder.fuel = min(builder.fuel + fuel_transfer, F_TOTAL)
-        event_bus.emit("fuel_transferred", reserver, builder, fuel_transfer)
+        fuel[reserver] -= fuel_transfer
+        fuel[builder] = min(int(fuel[builder]) + fuel_transfer, FUEL_FULL)
+        event_bus.emit("fuel_transferred", reserver, builder, fuel_transfer / FUEL_SCALE)
         # re-evaluate roles
-        if commander.fuel < reserver.fuel:
-            commander.role, reserver.role = reserver.role, commander.role
+        if fuel[commander] < fuel[reserver]:
+            swarm.role[[commander, reserver]] = swarm.role[[reserver, commander]]
         return True
     else:
         # not enough fuel
         return False
 
 # === Alpha AI ===
+# === Телеметрия и правила Alpha ===
+@njit(cache=True)
+def _telemetry(status, fuel):
+    """One pass: total fuel (scaled units) and satellites per status code"""
+    counts = np.zeros(len(STATUS_NAMES), np.int64)
+    total = 0
+    for i in range(status.size):
+        counts[status[i]] += 1
+        total += fuel[i]
+    return total, counts
+
+def _regulate_params(unstable, bond_radius, triplet_interval):
+    """New (bond_radius, triplet_interval) for this regulation tick"""
+    if unstable:
+        # many weak/dead => widen the bond radius, try to form more often
+        return min(WIDTH, bond_radius + 30), max(500, triplet_interval - 200)
+    # stabilize: slowly back to the default radius, reduce formation rate
+    return max(100, bond_radius - 10), min(4000, triplet_interval + 100)
+
 class AlphaAI:
-    def __init__(self, satellites, event_bus):
-        self.sat = satellites
+    def __init__(self, swarm, event_bus):
+        self.swarm = swarm
         self.bus = event_bus
         self.last_regulate = 0
         self.reg_interval = 1000  # ms
@@ -262,14 +535,15 @@ class AlphaAI:
         self.bus.on("fuel_transferred", self.on_fuel_transferred)
 
     def telemetry(self):
-        total = sum(s.fuel for s in self.sat)
-        avg_fuel = total / len(self.sat)
-        free_count = len([s for s in self.sat if s.status == "free"])
-        builder_count = len([s for s in self.sat if s.status == "builder"])
-        beacon_count = len([s for s in self.sat if s.status == "beacon"])
-        dead_count = len([s for s in self.sat if s.status == "dead"])
-        weak_count = len([s for s in self.sat if s.status == "weak"])
-        instability = (weak_count + dead_count) / max(1, len(self.sat))
+        total, c = _telemetry(self.swarm.status, self.swarm.fuel)
+        c = c.tolist()
+        avg_fuel = total / max(1, self.swarm.n) / FUEL_SCALE
+        free_count = c[FREE]
+        builder_count = c[BUILDER]
+        beacon_count = c[BEACON]
+        dead_count = c[DEAD]
+        weak_count = c[WEAK]
+        instability = (weak_count + dead_count) / max(1, self.swarm.n)
         return {
             "avg_fuel": avg_fuel,
             "free_count": free_count,
@@ -280,25 +554,19 @@ class AlphaAI:
             "instability": instability
         }
 
-    def regulate(self):
-        now = pygame.time.get_ticks()
+    def regulate(self, now):
         if now - self.last_regulate < self.reg_interval:
             return
         self.last_regulate = now
 
         tm = self.telemetry()
-        # Simple rules:
-        # if many weak/dead => increase bond radius to gather more units
-        if tm["instability"] > self.instability_threshold:
-            self.bond_radius = min(WIDTH, self.bond_radius + 30)
-            self.triplet_interval = max(500, self.triplet_interval - 200)  # try form more frequently
-            # also trigger restructure to free beacons
-            if tm["builder_count"] > 0:
-                self.trigger_restructure()
-        else:
-            # stabilize: slowly decrease bond radius back to default, reduce formation rate
-            self.bond_radius = max(100, self.bond_radius - 10)
-            self.triplet_interval = min(4000, self.triplet_interval + 100)
+        # Simple rules (see _regulate_params)
+        unstable = tm["instability"] > self.instability_threshold
+        self.bond_radius, self.triplet_interval = _regulate_params(
+            unstable, self.bond_radius, self.triplet_interval)
+        # also trigger restructure to free beacons
+        if unstable and tm["builder_count"] > 0:
+            self.trigger_restructure()
 
         # if too few free units, lower requirement for T_LOW to allow more join
         if tm["free_count"] < 5:
@@ -324,50 +592,47 @@ class AlphaAI:
 
     def trigger_restructure(self):
         """Force some builders to disband into beacons to create stability."""
-        builders = [s for s in self.sat if s.status == "builder"]
+        sw = self.swarm
+        builders = sw.members(BUILDER).tolist()
         if not builders:
             return
         # pick some builder groups to split
         for b in random.sample(builders, min(2, len(builders))):
-            pair = b.beacon_pair
-            if pair and len(pair) == 2:
-                commander, reserver = pair
+            if sw.beacon_pair[b, 0] != NONE:
+                commander, reserver = sw.beacon_pair[b]
                 # make them beacons (already likely), ensure their roles set
-                commander.status = "beacon"
-                reserver.status = "beacon"
-                commander.role = "commander"
-                reserver.role = "reserver"
+                sw.set_status([commander, reserver], BEACON)
+                sw.role[commander] = COMMANDER
+                sw.role[reserver] = RESERVER
                 # set builder to returning
-                b.status = "returning"
-                b.beacon_pair = None
+                sw.set_status(b, RETURNING)
+                sw.beacon_pair[b] = NONE
                 # small fuel penalty/regain
-                b.fuel = max(0, b.fuel - 5)
+                sw.fuel[b] = max(0, int(sw.fuel[b]) - RESTRUCTURE_COST)
 
     def prioritize_rescue(self):
         """Assign nearest free sattelites to rescue dead ones."""
-        dead = find_dead()
-        if not dead:
+        sw = self.swarm
+        dead = find_unclaimed_dead()
+        if not dead.size:
             return
-        free = [s for s in self.sat if s.status == "free" and s.fuel > T_LOW]
-        for victim in dead:
-            if not free:
-                break
-            rescuer = min(free, key=lambda s: math.hypot(s.x - victim.x, s.y - victim.y))
-            rescuer.status = "rescue"
-            rescuer.target = victim
-            free.remove(rescuer)
+        free = sw.members(FREE)
+        assign_rescuers(free[sw.fuel[free] > FUEL_LOW], dead)
 
 # === Инициализация Alpha ===
-alpha = AlphaAI(satellites, event_bus)
+alpha = AlphaAI(swarm, event_bus)
 
 # === Main loop ===
 running = True
 clock = pygame.time.Clock()
 last_triplet_try = 0
+frame = 0
+cx, cy = WIDTH * 0.5, HEIGHT * 0.5   # base position, read by the per-satellite loops
 
 while running:
     dt = clock.tick(30)
-    now = pygame.time.get_ticks()
+    frame += 1
+    now = pygame.time.get_ticks()  # one clock read per frame, shared below
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
@@ -375,90 +640,105 @@ while running:
         elif event.type == pygame.MOUSEBUTTONDOWN:
             x, y = event.pos
             # click to kill a sat for testing
-            for s in satellites:
-                if math.hypot(s.x - x, s.y - y) < SAT_RADIUS + 2:
-                    s.status = "dead"
-                    s.fuel = 0
+            ex = swarm.x - np.float32(x)
+            ey = swarm.y - np.float32(y)
+            hit = np.flatnonzero(ex*ex + ey*ey < (SAT_RADIUS + 2) ** 2)
+            if hit.size:
+                swarm.set_status(hit, DEAD)
+                swarm.fuel[hit] = 0
+
+    # keep index order close to spatial order for the spatial-hash scans
+    if frame % REORDER_EVERY == 0:
+        swarm.reorder()
+        grid.clear()    # indices moved: re-bucket everyone on the next sync
 
     # move & basic behaviors
-    dead = find_dead()
-    free = find_free()
-    beacons = find_beacons()
-    weak = find_weak()
-
-    for s in satellites:
-        s.move()
+    swarm.step()
+    st, fuel = swarm.status, swarm.fuel
 
+    # rare per-satellite events, in index order
+    for i in np.flatnonzero((st == RETURNING) | (st == RESCUE) | (st == BUILDER)):
         # when returning to base
-        if s.status == "returning" and math.hypot(s.x - WIDTH/2, s.y - HEIGHT/2) < 10:
-            s.fuel = F_TOTAL
-            s.status = "free"
-            s.dx = random.uniform(-1, 1)
-            s.dy = random.uniform(-1, 1)
-            s.role = None
-            s.beacon_pair = None
+        if st[i] == RETURNING and dist2_to(i, cx, cy) < 10 * 10:
+            fuel[i] = FUEL_FULL
+            swarm.set_status(i, FREE)
+            swarm.dx[i] = random.uniform(-1, 1)
+            swarm.dy[i] = random.uniform(-1, 1)
+            swarm.role[i] = NO_ROLE
+            swarm.beacon_pair[i] = NONE
 
         # rescue arrival
-        if s.status == "rescue" and s.target and math.hypot(s.x - s.target.x, s.y - s.target.y) < 10:
-            if s.fuel >= 20:
-                amount = min(20, s.fuel // 2)
-                s.target.fuel = min(s.target.fuel + amount, F_TOTAL)
-                s.fuel -= amount
-                s.target.status = "free"
-                s.target.dx = random.uniform(-1, 1)
-                s.target.dy = random.uniform(-1, 1)
-                s.status = "returning"
-                s.target = None
+        t = swarm.target[i]
+        if st[i] == RESCUE and t != NONE and dist2(i, t) < 10 * 10:
+            if fuel[i] >= FUEL_RESCUE_SHARE:
+                amount = min(FUEL_RESCUE_SHARE, int(fuel[i]) // 2)
+                fuel[t] = min(int(fuel[t]) + amount, FUEL_FULL)
+                fuel[i] -= amount
+                swarm.set_status(t, FREE)
+                swarm.dx[t] = random.uniform(-1, 1)
+                swarm.dy[t] = random.uniform(-1, 1)
+                swarm.set_status(i, RETURNING)
+                swarm.target[i] = NONE
 
         # builder low fuel -> ask reserver
-        if s.status == "builder" and s.fuel < T_LOW:
-            if not refuel_builder(s):
+        if st[i] == BUILDER and fuel[i] < FUEL_LOW:
+            if not refuel_builder(i):
                 # failed to refuel -> return to base
-                s.status = "returning"
-                s.beacon_pair = None
+                swarm.set_status(i, RETURNING)
+                swarm.beacon_pair[i] = NONE
+
+    # free satellites running low go back to base to refill before they turn weak
+    low = swarm.members(FREE)
+    low = low[fuel[low] < FUEL_LOW]
+    if low.size:
+        swarm.set_status(low, RETURNING)
 
-        # free satellites with enough fuel rescue dead
-        if s.status == "free" and s.fuel >= T_LOW and dead:
-            victim = min(dead, key=lambda d: math.hypot(s.x - d.x, s.y - d.y))
-            s.status = "rescue"
-            s.target = victim
+    # free satellites with enough fuel rescue dead, one rescuer per victim
+    # (statuses are current here: deaths from this step and revivals above count)
+    dead = find_unclaimed_dead()
+    if dead.size:
+        assign_rescuers(find_free(), dead)
 
     # Alpha regulation
-    alpha.regulate()
+    alpha.regulate(now)
 
     # Triplet formation controlled by Alpha.triplet_interval and bond_radius
     if now - last_triplet_try > alpha.triplet_interval:
-        trip = form_triplet(alpha.bond_radius)
+        trip = form_triplet(now, alpha.bond_radius)
         last_triplet_try = now
         # if trip is formed, trip handled by event hook already
 
     # free satellites move to nearest beacons to join
     beacons = find_beacons()
     free = find_free()
-    for s in free:
-        if beacons:
-            nearest = min(beacons, key=lambda b: math.hypot(s.x - b.x, s.y - b.y))
-            # only move to beacons within some reasonable range (alpha.bond_radius)
-            if math.hypot(s.x - nearest.x, s.y - nearest.y) < alpha.bond_radius:
-                s.move_to(nearest.x, nearest.y)
+    if free.size and beacons.size:
+        d2 = cross_dist2(free, beacons)
+        nn = d2.argmin(axis=1)
+        # only move to beacons within some reasonable range (alpha.bond_radius)
+        joining = d2[np.arange(len(free)), nn] < alpha.bond_radius ** 2
+        for s, b in zip(free[joining], beacons[nn[joining]]):
+            swarm.move_to(s, swarm.x[b], swarm.y[b])
 
     # weak satellites prefer reserver beacons or go to base
     weak = find_weak()
+    sync_grid()
     for s in weak:
-        if beacons:
-            # prefer reserver with fuel
-            eligible = [b for b in beacons if b.role == "reserver" and b.fuel > F_TOTAL * 0.33]
+        if beacons.size:
+            # prefer reserver with fuel (donors drain as the loop goes):
+            # the nearest one in contact range, see grid
+            eligible = [b for b in grid.query(float(swarm.x[s]), float(swarm.y[s]), 12)
+                        if swarm.status[b] == BEACON and swarm.role[b] == RESERVER
+                        and swarm.fuel[b] > FUEL_RESERVE_MIN]
             if eligible:
-                nearest = min(eligible, key=lambda b: math.hypot(s.x - b.x, s.y - b.y))
-                if math.hypot(s.x - nearest.x, s.y - nearest.y) < 12:
-                    transfer = min(F_MAX_SHARE, nearest.fuel - T_CRITICAL)
-                    if transfer > 0:
-                        nearest.fuel -= transfer
-                        s.fuel = min(s.fuel + transfer, F_TOTAL)
-                        s.status = "free"
-                        continue
+                nearest = eligible[0]
+                transfer = min(FUEL_MAX_SHARE, int(swarm.fuel[nearest]) - FUEL_CRITICAL)
+                if transfer > 0:
+                    swarm.fuel[nearest] -= transfer
+                    swarm.fuel[s] = min(int(swarm.fuel[s]) + transfer, FUEL_FULL)
+                    swarm.set_status(s, FREE)
+                    continue
             # otherwise go to base
-            s.move_to(WIDTH / 2, HEIGHT / 2)
+            swarm.move_to(s, cx, cy)
 
     # drawing
     screen.fill((0, 0, 0))
@@ -466,8 +746,7 @@ while running:
     # draw target figure (Alpha might direct to form a circle) - optional visualization
     # pygame.draw.circle(screen, (50,50,50), (WIDTH//2, HEIGHT//2), 120, 1)
 
-    for s in satellites:
-        s.draw()
+    swarm.draw()
 
     # top-left telemetry
     tm = alpha.telemetry()
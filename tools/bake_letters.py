@@ -0,0 +1,31 @@
+# bake_letters.py
+# Precompute letter target points into letter_points/letter_points_<L>.npz so
+# main.py can load them instead of generating at startup.
+#
+# usage: python tools/bake_letters.py [LETTERS] [--scale S] [--spacing D]
+#   LETTERS defaults to every letter with its own builder; the defaults for
+#   scale/spacing match what main.py asks for (BUILD_SCALE, LETTER_SPACING)
+
+import os, sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from letters import BAKED_DIR, LETTER_BUILDERS, baked_path, generate_letter_points
+
+def bake(letters, scale=1.0, spacing=1.2):
+    os.makedirs(BAKED_DIR, exist_ok=True)
+    for ch in letters:
+        arr = np.array(generate_letter_points(ch, scale, spacing), dtype=float).reshape(-1, 3)
+        np.savez_compressed(baked_path(ch), pts=arr, scale=scale, spacing=spacing)
+        print(f"{ch}: {len(arr)} points -> {baked_path(ch)}")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    opts = {"--scale": 1.0, "--spacing": 1.2}
+    for name in opts:
+        if name in args:
+            k = args.index(name)
+            opts[name] = float(args[k + 1])
+            del args[k:k + 2]
+    letters = args[0].upper() if args else "".join(LETTER_BUILDERS)
+    bake(letters, opts["--scale"], opts["--spacing"])